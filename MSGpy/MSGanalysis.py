@@ -0,0 +1,265 @@
+def _analysis_result(source):
+    """this function returns the MSG_result of a MSG_result or trajectory store directory given to an analysis
+    function"""
+    from .MSGresult import _as_result
+    result = _as_result(source)
+    if result is None:
+        raise ValueError('ERROR: please give a MSG_result [MSG_galaxy(..., result = True)] or the directory of a '
+                         'trajectory store \n /ᐠ=ᆽ=ᐟ\\ <(hisss.....)')
+    return result
+
+def _analysis_setup(source, mass, dt, soft_param):
+    """this function returns the MSG_result of source with the bulge masses, dt and soft_param of the simulation;
+    arguments that are not given are taken from the result [or trajectory store metadata]"""
+    import numpy as np # computational
+    result = _analysis_result(source)
+    mass = result.mass if mass is None else np.asarray(mass, dtype = float)
+    dt = result.dt if dt is None else dt
+    soft_param = result.soft_param if soft_param is None else soft_param
+    if mass is None or dt is None or soft_param is None:
+        raise ValueError('ERROR: please specify mass, dt and soft_param of the simulation \n /ᐠ=ᆽ=ᐟ\\ <(hisss.....)')
+    return result, mass.reshape(-1), float(dt), float(soft_param)
+
+def _snapshot_index(result, snapshots):
+    """this function returns the snapshot indices selected by snapshots [None, slice, integer or list]"""
+    import numpy as np # computational
+    idx = np.arange(len(result))
+    return idx if snapshots is None else np.atleast_1d(idx[snapshots])
+
+def _central_difference(arr, times, idx):
+    """this function returns the rows idx of arr and their velocities from central differences [one sided at the
+    first and last rows], as contiguous (3, rows, ...) arrays with the x, y, z components first; only the rows 
+    around idx are read, so arr can be a memory-mapped array"""
+    import numpy as np # computational
+    if len(arr) < 2:
+        raise ValueError('ERROR: at least 2 snapshots are needed to compute velocities \n /ᐠ=ᆽ=ᐟ\\ <(hisss.....)')
+    lo, hi = np.maximum(idx - 1, 0), np.minimum(idx + 1, len(arr) - 1)
+    # read every needed row once, copying it to component first order
+    rows = np.unique(np.concatenate((lo, idx, hi)))
+    block = np.moveaxis(arr[rows[0]:rows[-1] + 1] if rows[-1] - rows[0] < len(rows) else arr[rows], -1, 0).copy()
+
+    def take(i):
+        """rows i of the block, as a view for consecutive rows"""
+        p = np.searchsorted(rows, i)
+        return block[:, p[0]:p[-1] + 1] if np.all(np.diff(p) == 1) else block[:, p]
+
+    x = take(idx)
+    dx = take(hi) - take(lo)
+    dx /= (times[hi] - times[lo]).astype(dx.dtype).reshape((-1,) + (1,) * (dx.ndim - 2))
+    return x, dx
+
+def _energy_chunks(result, d, idx, mass, dt, soft_param, velocities, max_memory):
+    """this generator yields (start, stop, E) for chunks of the snapshots idx, where E is the (K, c, N) specific
+    energy of every particle of disk d relative to every bulge at snapshots idx[start:stop]; the chunks are sized
+    so the temporary arrays stay below max_memory bytes"""
+    import numpy as np # computational
+    disk = result.disk(d)
+    S, N = disk.shape[:2]
+    K = len(mass)
+    dtype = disk.dtype
+    # bulge positions and velocities at every snapshot, indexed by timestep for full resolution bulge tracks
+    bulges = result._bulges
+    if result.full_bulges:
+        rows, bulge_times = result.snap_steps, np.arange(len(bulges)) * dt
+    else:
+        rows, bulge_times = np.arange(S), result.snap_steps * dt
+    snap_times = result.snap_steps * dt
+    # energies, positions, velocities and 2 scratch arrays of N values per snapshot
+    chunk = max(1, int(max_memory // (N * (K + 11) * np.dtype(dtype).itemsize)))
+    for start in range(0, len(idx), chunk):
+        stop = min(start + chunk, len(idx))
+        i = idx[start:stop]
+        X, V = _central_difference(bulges, bulge_times, rows[i])
+        X, V = X.astype(dtype)[..., np.newaxis], V.astype(dtype)[..., np.newaxis]
+        # contiguous (3, c, N) coordinates, so every bulge is a few passes over contiguous (c, N) arrays
+        if velocities is None:
+            x, v = _central_difference(disk, snap_times, i)
+        else:
+            x = np.moveaxis(disk[i], -1, 0).copy()
+            v = np.moveaxis(np.asarray(velocities[i], dtype = dtype), -1, 0).copy()
+        E = np.empty((K, stop - start, N), dtype = dtype)
+        # blocks of snapshots of about 65536 values, so the scratch arrays stay in cache
+        block = max(1, 65536 // N)
+        DEL, R2 = np.empty((block, N), dtype = dtype), np.empty((block, N), dtype = dtype)
+        for b in range(0, stop - start, block):
+            c = min(block, stop - start - b)
+            dl, r2 = DEL[:c], R2[:c]
+            for k in range(K):
+                # Plummer softened potential -M_k / (r**2 + Sf**2)**.5 [G = 1]
+                r2.fill(soft_param**2)
+                for j in range(3):
+                    np.subtract(x[j, b:b+c], X[j, b:b+c, k], out = dl)
+                    dl *= dl
+                    r2 += dl
+                np.sqrt(r2, out = r2)
+                np.divide(-mass[k], r2, out = E[k, b:b+c], casting = 'same_kind')
+                # kinetic energy in the frame of the bulge .5 |v - V_k|**2
+                r2.fill(0)
+                for j in range(3):
+                    np.subtract(v[j, b:b+c], V[j, b:b+c, k], out = dl)
+                    dl *= dl
+                    r2 += dl
+                r2 *= .5
+                E[k, b:b+c] += r2
+        yield start, stop, E
+
+def _hosts(E):
+    """index of the bulge each particle is most bound to, -1 if it is not bound to any bulge; E is (K, ...)"""
+    import numpy as np # computational
+    # running minimum over the few bulges, faster than argmin over the short first axis
+    host = np.zeros(E.shape[1:], dtype = np.int8)
+    lowest = E[0].copy()
+    for k in range(1, len(E)):
+        lower = E[k] < lowest
+        host[lower] = k
+        np.minimum(lowest, E[k], out = lowest)
+    host[lowest >= 0] = -1
+    return host
+
+def MSG_energy(source, disk = 0, snapshots = None, mass = None, dt = None, soft_param = None, velocities = None,
+               max_memory = 2e8):
+    """
+    this function calculates the specific energy of every particle of a disk relative to every bulge,
+    E = .5 |v - V_k|**2 - M_k / (r**2 + soft_param**2)**.5, with the same Plummer softening as MSG_galaxy
+    the snapshots are processed in chunks, so only the selected snapshots are read from a trajectory store
+    ----------------------------------------------------------------------
+    source [MSG_result or string]: result of MSG_galaxy(..., result = True) or directory of a trajectory store
+
+    disk [string or integer]: by default 0; label [or index] of the disk
+
+    snapshots [slice, integer or list]: by default None [every snapshot]; snapshots to analyze
+    ex: snapshots = slice(0, None, 10)
+
+    mass, dt, soft_param: by default taken from the simulation; bulge masses, timestep and softening parameter
+
+    velocities [numpy array]: by default None; (S, N, 3) particle velocities at every snapshot; if None, the
+    velocities are calculated from the positions with central differences, so save_every should be small
+
+    max_memory [float]: by default 2e8; bytes of temporary arrays used per chunk of snapshots
+    ----------------------------------------------------------------------------------
+    OUTPUT [numpy array]: (snapshots, N, K) specific energies, in the dtype of the disk
+    example: E = MSG_energy(result, 'companion', snapshots = [0, 100, 200])
+    =^._.^=
+    """
+    import numpy as np # computational
+    result, mass, dt, soft_param = _analysis_setup(source, mass, dt, soft_param)
+    idx = _snapshot_index(result, snapshots)
+    data = result.disk(disk)
+    out = np.empty((len(idx), data.shape[1], len(mass)), dtype = data.dtype)
+    for start, stop, E in _energy_chunks(result, disk, idx, mass, dt, soft_param, velocities, max_memory):
+        out[start:stop] = np.moveaxis(E, 0, -1)
+    return out
+
+def MSG_hosts(source, disk = 0, snapshots = None, mass = None, dt = None, soft_param = None, velocities = None,
+              max_memory = 2e8):
+    """
+    this function classifies every particle of a disk by the bulge it is most bound to [lowest negative specific
+    energy, see MSG_energy] at every snapshot
+    ----------------------------------------------------------------------
+    source, disk, snapshots, mass, dt, soft_param, velocities, max_memory: see MSG_energy
+    ----------------------------------------------------------------------------------
+    OUTPUT [numpy array]: (snapshots, N) bulge index of every particle, -1 for particles not bound to any bulge
+    example: host = MSG_hosts(result, 'companion'); captured = host[-1] == 1
+    =^._.^=
+    """
+    import numpy as np # computational
+    result, mass, dt, soft_param = _analysis_setup(source, mass, dt, soft_param)
+    idx = _snapshot_index(result, snapshots)
+    out = np.empty((len(idx), result.disk(disk).shape[1]), dtype = np.int8)
+    for start, stop, E in _energy_chunks(result, disk, idx, mass, dt, soft_param, velocities, max_memory):
+        out[start:stop] = _hosts(E)
+    return out
+
+def MSG_tidal(source, disks = None, snapshots = None, mass = None, dt = None, soft_param = None, max_memory = 2e8):
+    """
+    this function summarizes the tidal features of every disk over time: the fraction of particles bound to each
+    bulge, the unbound fraction [tidal tails and stripped particles] and the fraction transferred to a different
+    bulge than the one they were bound to at the first snapshot; multiply by the disk mass to get masses
+    ----------------------------------------------------------------------
+    source, snapshots, mass, dt, soft_param, max_memory: see MSG_energy
+
+    disks [list]: by default None [every disk]; labels [or indices] of the disks
+    ----------------------------------------------------------------------------------
+    OUTPUT [dictionary]: {'snap_steps': timestep of every snapshot, label: {'bound': (snapshots, K) fractions,
+    'unbound': (snapshots,) fractions, 'transferred': (snapshots,) fractions}, ...}
+    example: tidal = MSG_tidal('merger_run'); plt.plot(tidal['snap_steps'], tidal['primary']['unbound'])
+    =^._.^=
+    """
+    import numpy as np # computational
+    result, mass, dt, soft_param = _analysis_setup(source, mass, dt, soft_param)
+    idx = _snapshot_index(result, snapshots)
+    K = len(mass)
+    out = {'snap_steps': result.snap_steps[idx]}
+    for d in (result.labels if disks is None else disks):
+        N = result.disk(d).shape[1]
+        bound, transferred = np.zeros((len(idx), K)), np.zeros(len(idx))
+        first = None
+        for start, stop, E in _energy_chunks(result, d, idx, mass, dt, soft_param, None, max_memory):
+            host = _hosts(E)
+            if first is None:
+                first = host[0]
+            # count the particles bound to each bulge at every snapshot of the chunk
+            for k in range(K):
+                bound[start:stop, k] = np.count_nonzero(host == k, axis = 1) / N
+            transferred[start:stop] = ((host != first) & (host >= 0) & (first >= 0)).sum(axis = 1) / N
+        out[result.labels[result._index(d)]] = {'bound': bound, 'unbound': 1 - bound.sum(axis = 1),
+                                                'transferred': transferred}
+    return out
+
+def MSG_profile(source, disk = 0, bulge = 0, snapshots = None, bins = 50, rmax = None, density = True,
+                max_memory = 2e8):
+    """
+    this function calculates the radial profile of a disk around a bulge at every snapshot, ei. the number
+    density of particles in spherical shells
+    ----------------------------------------------------------------------
+    source, disk, snapshots, max_memory: see MSG_energy
+
+    bulge [integer]: by default 0; index of the bulge at the center of the profile
+
+    bins [integer or numpy array]: by default 50; number of shells, or shell edges
+
+    rmax [float]: by default None; radius of the outer shell [default: largest radius at the first snapshot]
+
+    density [boolean]: by default True, number of particles per unit volume; if False, number of particles
+    ----------------------------------------------------------------------------------
+    OUTPUT [numpy array]: (bins + 1,) shell edges and the (snapshots, bins) profiles
+    example: edges, profile = MSG_profile(result, 'primary', bulge = 0, snapshots = [0, -1])
+    =^._.^=
+    """
+    import numpy as np # computational
+    result = _analysis_result(source)
+    idx = _snapshot_index(result, snapshots)
+    data = result.disk(disk)
+    rows = result.snap_steps if result.full_bulges else np.arange(len(result))
+    center = lambda i: result._bulges[rows[i], bulge].astype(data.dtype)[:, np.newaxis, :]
+
+    def radii(i):
+        """distances of the particles to the bulge at snapshots i"""
+        DEL = data[i] - center(i)
+        r = np.einsum('cnj,cnj->cn', DEL, DEL)
+        return np.sqrt(r, out = r)
+
+    if np.ndim(bins) == 0:
+        rmax = float(radii(idx[:1]).max()) if rmax is None else rmax
+        edges = np.linspace(0, rmax, int(bins) + 1)
+    else:
+        edges = np.asarray(bins, dtype = float)
+    n_bins = len(edges) - 1
+    out = np.zeros((len(idx), n_bins))
+    chunk = max(1, int(max_memory // (data.shape[1] * 8 * np.dtype(data.dtype).itemsize)))
+    for start in range(0, len(idx), chunk):
+        stop = min(start + chunk, len(idx))
+        r = radii(idx[start:stop])
+        if np.ndim(bins) == 0:
+            # equal shells are found by division instead of a search
+            shell = (r * (n_bins / edges[-1])).astype(np.intp)
+        else:
+            shell = np.searchsorted(edges, r, side = 'right') - 1
+        shell[(shell >= n_bins) & (r <= edges[-1])] = n_bins - 1 # the outer edge belongs to the last shell
+        # one bincount for the whole chunk, offsetting the shells of every snapshot
+        inside = (shell >= 0) & (shell < n_bins)
+        shell += np.arange(stop - start)[:, np.newaxis] * n_bins
+        out[start:stop] = np.bincount(shell[inside], minlength = (stop - start) * n_bins).reshape(-1, n_bins)
+    if density:
+        out /= 4 / 3 * np.pi * np.diff(edges**3)
+    return edges, out
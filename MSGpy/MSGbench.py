@@ -0,0 +1,235 @@
+def _bench_merger(n_particles, companion = True):
+    """this function builds the "running the code" merger with about n_particles test particles in the primary
+    disk [and a companion disk of about a quarter of that], returning MSG_galaxy keyword arguments"""
+    import numpy as np # computational
+    from .MSGdisk import MSG_disk
+    pos = np.array([[-12.5, 13.0, 0.0], [0.0, 0.0, 0.0]])
+    vel = np.array([[1.5, -1.0, 0.0], [0.0, 0.0, 0.0]])
+    mas = np.array([[1.0], [3.0]])
+    # ring i holds density * (6 i + 6) particles, so 6 rings hold 162 * density and 3 rings 54 * density
+    pos_p, vel_p, N = MSG_disk(6, 3, -1, n_particles / 162)
+    kwargs = {'gal_pos': pos, 'gal_vel': vel, 'mass': mas, 'particle_pos': pos_p, 'particle_vel': vel_p}
+    if companion:
+        com_p, com_v, M = MSG_disk(3, 1, -1, n_particles / 4 / 54, [-12.5, 13.0, 0.0], [1.5, -1.0, 0.0])
+        kwargs.update({'disk2': com_p, 'diskvel': com_v})
+    return kwargs
+
+def _bench_run(func, repeat):
+    """this function times func, returning the best wall time of repeat runs and the peak traced memory in bytes
+    of one extra run [traced separately so tracemalloc does not slow down the timed runs]"""
+    import io # silence prints
+    import time # timing
+    import tracemalloc # memory
+    import contextlib # silence prints
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        times = []
+        for r in range(repeat):
+            t = time.perf_counter()
+            func()
+            times.append(time.perf_counter() - t)
+        tracemalloc.start()
+        try:
+            func()
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return min(times), peak
+
+def _bench_cases(quick = False, only = None):
+    """this function returns the list of (name, parameters, function, steps, particles) benchmark cases; steps and
+    particles are used to report steps/s and particle steps/s [None if not applicable]. only is the list of case
+    names to build [by default all], so the inputs of the other cases are not created"""
+    import os # cpu count
+    import numpy as np # computational
+    from .MSGdisk import MSG_disk
+    from .MSGgalaxy import MSG_galaxy
+    from .MSGrot import MSG_rotate
+
+    scale = 10 if quick else 1 # quick runs use smaller problems
+    cases = []
+
+    def wanted(name):
+        return only is None or name in only
+
+    # DISK SETUP
+    if wanted('disk'):
+        for rings, density in [(6, 3.7), (50, 20), (200, 50 // scale)]:
+            N = int(sum(int(density * (6*i + 6)) for i in range(1, rings + 1)))
+            cases.append(('disk', {'rings': rings, 'density': density},
+                          lambda rings = rings, density = density: MSG_disk(rings, 3, -1, density), None, N))
+
+    # INTEGRATION
+    if wanted('galaxy'):
+        for n_particles, timesteps in [(1000, 2000 // scale), (10000, 1000 // scale), (100000, 200 // scale)]:
+            for companion in (False, True):
+                kwargs = _bench_merger(n_particles, companion)
+                N = sum(len(kwargs[k]) for k in ('particle_pos', 'disk2') if k in kwargs)
+                def run(kwargs = kwargs, timesteps = timesteps):
+                    # copy the state, since MSG_galaxy updates it in place
+                    args = {k: v.copy() for k, v in kwargs.items()}
+                    MSG_galaxy(**args, dt = .01, timesteps = timesteps, soft_param = .1)
+                cases.append(('galaxy', {'particles': N, 'timesteps': timesteps, 'disk2': companion}, run,
+                              timesteps, N))
+
+    # THREADED INTEGRATION, powers of 2 workers up to the number of cores [at most 16]
+    if wanted('galaxy_workers'):
+        kwargs = _bench_merger(200000 // scale, True)
+        N = len(kwargs['particle_pos']) + len(kwargs['disk2'])
+        for workers in [2**i for i in range(min(16, os.cpu_count() or 1).bit_length())]:
+            def run(workers = workers, kwargs = kwargs):
+                args = {k: v.copy() for k, v in kwargs.items()}
+                MSG_galaxy(**args, dt = .01, timesteps = 50, soft_param = .1, save_steps = [50], workers = workers)
+            cases.append(('galaxy_workers', {'particles': N, 'timesteps': 50, 'workers': workers}, run, 50, N))
+
+    # SELF-GRAVITY of massive particles, particle-mesh solver against direct summation
+    if wanted('self_gravity'):
+        from .MSGgravity import MSG_self_gravity
+        for n_particles in (1000, 8000 // (2 if quick else 1)):
+            pos_p = _bench_merger(n_particles, False)['particle_pos']
+            N = len(pos_p)
+            cases.append(('self_gravity', {'particles': N, 'method': 'direct'},
+                          lambda pos_p = pos_p, N = N: MSG_self_gravity(pos_p, 1 / N, direct = True), None, N))
+            for grid in (32, 64):
+                cases.append(('self_gravity', {'particles': N, 'method': 'mesh', 'grid': grid},
+                              lambda pos_p = pos_p, N = N, grid = grid: MSG_self_gravity(pos_p, 1 / N,
+                                                                                         grid = grid), None, N))
+
+    # ROTATION
+    if wanted('rotate'):
+        for n_particles in (10000, 1000000 // scale):
+            pos_p, vel_p, N = MSG_disk(6, 3, -1, n_particles / 162)
+            gal = np.array([0., 0., 0.])
+            cases.append(('rotate', {'particles': N},
+                          lambda pos_p = pos_p, vel_p = vel_p: MSG_rotate(gal, gal, pos_p, vel_p, -40, Xrot = True),
+                          None, N))
+
+    # PLOTTING
+    if wanted('plot'):
+        for n_particles in (1000, 20000 // scale):
+            kwargs = _bench_merger(n_particles, True)
+            bulges = np.array([[-12.5, 13.0, 0.0]]), np.array([[0.0, 0.0, 0.0]])
+            N, M = len(kwargs['particle_pos']), len(kwargs['disk2'])
+            def run(kwargs = kwargs, bulges = bulges, N = N, M = M):
+                import matplotlib.pyplot as plt
+                from .MSGplot import MSG_plot
+                MSG_plot(bulges[0], bulges[1], kwargs['particle_pos'], N, 0, kwargs['disk2'], M, tails = True)
+                plt.gcf().canvas.draw() # render the figure
+                plt.close('all')
+            cases.append(('plot', {'particles': N + M}, run, None, N + M))
+    if wanted('density'):
+        kwargs = _bench_merger(1000000 // scale, True)
+        N, M = len(kwargs['particle_pos']), len(kwargs['disk2'])
+        def run(kwargs = kwargs, N = N, M = M):
+            from .MSGplot import MSG_density
+            MSG_density(kwargs['gal_pos'][:1], kwargs['gal_pos'][1:], kwargs['particle_pos'], N, 0,
+                        kwargs['disk2'], M)
+        cases.append(('density', {'particles': N + M}, run, None, N + M))
+    return cases
+
+def MSG_benchmark(output = None, compare = None, quick = False, repeat = 3, tolerance = .1, only = None):
+    """
+    this function runs the benchmark suite of MSGpy: disk setup, integration [with and without a companion disk,
+    and with several threads], self-gravity, rotation and plotting, and reports the time, steps/s, particle 
+    steps/s and peak memory of every case; the results can be saved to a json file and compared with a previous
+    results file
+    ----------------------------------------------------------------------
+    output [string]: by default None; json file to save the results to
+
+    compare [string]: by default None; json results file of a previous run [ei. of an older version] to compare
+    with; cases more than tolerance slower are marked as regressions
+
+    quick [boolean]: by default False; if True, run smaller problems [takes a few seconds]
+
+    repeat [integer]: by default 3; number of timed runs of each case, the best time is reported
+
+    tolerance [float]: by default .1; relative slow down reported as a regression
+
+    only [list]: by default None; names of the cases to run [ei. ['galaxy', 'rotate']], by default all of
+    'disk', 'galaxy', 'galaxy_workers', 'self_gravity', 'rotate', 'plot' and 'density'
+    ----------------------------------------------------------------------------------
+    OUTPUT [dictionary]: {'system': {...}, 'results': [{'name', 'params', 'time', 'steps_per_s',
+    'particle_steps_per_s', 'peak_memory'}, ...]}, times in seconds and memory in bytes
+    example: MSG_benchmark(output = 'bench.json', compare = 'bench_old.json')
+    from the command line: python -m MSGpy.MSGbench --output bench.json --compare bench_old.json
+    =^._.^=
+    """
+    import io # silence prints
+    import os # cpu count
+    import sys # python version
+    import json # results file
+    import time # date
+    import platform # machine
+    import contextlib # silence prints
+    import numpy as np # computational
+    import matplotlib
+
+    # render figures without a display, switching back to the previous backend at the end
+    import matplotlib.pyplot as plt
+    backend = matplotlib.get_backend()
+    plt.switch_backend('Agg')
+    try:
+        from importlib.metadata import version
+        msg_version = version('MSGpy')
+    except Exception:
+        msg_version = None
+
+    report = {'system': {'msgpy': msg_version, 'python': sys.version.split()[0], 'numpy': np.__version__,
+                         'matplotlib': matplotlib.__version__, 'platform': platform.platform(),
+                         'processor': platform.machine(), 'cpu_count': os.cpu_count(),
+                         'date': time.strftime('%Y-%m-%d %H:%M:%S'), 'quick': bool(quick)},
+              'results': []}
+
+    print('benchmarking....  /ᐠ –ꞈ –ᐟ\\<[pls be patient]')
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            cases = _bench_cases(quick, only)
+        for name, params, func, steps, particles in cases:
+            t, peak = _bench_run(func, repeat)
+            result = {'name': name, 'params': params, 'time': t,
+                      'steps_per_s': steps / t if steps is not None else None,
+                      'particle_steps_per_s': steps * particles / t if steps is not None else particles / t,
+                      'peak_memory': peak}
+            report['results'].append(result)
+            print(name.ljust(15), json.dumps(params).ljust(55), '%10.4f s' % t,
+                  '%12.3e particle steps/s' % result['particle_steps_per_s'] if steps is not None else
+                  '%12.3e particles/s' % result['particle_steps_per_s'], '%9.1f MB' % (peak / 1e6))
+    finally:
+        plt.switch_backend(backend)
+
+    if output is not None:
+        with open(output, 'w') as f:
+            json.dump(report, f, indent = 1)
+
+    if compare is not None:
+        with open(compare) as f:
+            old = {(r['name'], json.dumps(r['params'], sort_keys = True)): r for r in json.load(f)['results']}
+        report['comparison'] = []
+        print('\ncomparison with', compare)
+        for result in report['results']:
+            previous = old.get((result['name'], json.dumps(result['params'], sort_keys = True)))
+            if previous is None:
+                continue
+            ratio = result['time'] / previous['time']
+            regression = ratio > 1 + tolerance
+            report['comparison'].append({'name': result['name'], 'params': result['params'], 'speedup': 1 / ratio,
+                                         'regression': regression})
+            print(result['name'].ljust(15), json.dumps(result['params']).ljust(55), '%6.2fx faster' % (1 / ratio),
+                  ' <-- REGRESSION /ᐠ=ᆽ=ᐟ\\' if regression else '')
+    print('benchmark complete [yay!!! (ﾐΦ ﻌ Φﾐ)✿ *ᵖᵘʳʳ*]')
+    return report
+
+if __name__ == '__main__':
+    import argparse # command line
+    parser = argparse.ArgumentParser(description = 'run the MSGpy benchmark suite')
+    parser.add_argument('--output', help = 'json file to save the results to')
+    parser.add_argument('--compare', help = 'json results file of a previous run to compare with')
+    parser.add_argument('--quick', action = 'store_true', help = 'run smaller problems')
+    parser.add_argument('--repeat', type = int, default = 3, help = 'number of timed runs of each case')
+    parser.add_argument('--tolerance', type = float, default = .1, help = 'relative slow down reported as a regression')
+    parser.add_argument('--only', nargs = '+', help = 'names of the cases to run')
+    args = parser.parse_args()
+    report = MSG_benchmark(args.output, args.compare, args.quick, args.repeat, args.tolerance, args.only)
+    # exit with an error if a regression was found, so the benchmark can be used in scripts
+    if any(c['regression'] for c in report.get('comparison', [])):
+        raise SystemExit(1)
@@ -1,4 +1,6 @@
-def MSG_disk(number_of_rings, mass, rotation_dir, density, origin = ([[0.,0.,0.]]), velocity = ([[0.,0.,0.]])):
+def MSG_disk(number_of_rings, mass, rotation_dir, density, origin = ([[0.,0.,0.]]), velocity = ([[0.,0.,0.]]), 
+             profile = 'rings', scale_length = None, scale_height = 0., random_phase = False, seed = None, 
+             quiet = False):
     """
     this function calculates the x, y position and velocities for each particle in the galactic disk centered
     around the origin by default
@@ -20,6 +22,26 @@ def MSG_disk(number_of_rings, mass, rotation_dir, density, origin = ([[0.,0.,0.]
     velocity [numpy array]: corrects galactic disk particle velocities to match constant velocity of bulge
     must be set to same x,y,z velocity as host galaxy bulge
     format: np.array([[Vx, Vy, Vz]])
+    ----------------------------------------------------------------------
+    [OPTIONAL]: disk profiles other than the TOOMRE and TOOMRE rings; the random numbers are drawn from a 
+    numpy Generator seeded by seed, so the same seed always gives the same disk
+    
+    profile [string]: by default 'rings'
+    'rings': particles equally spaced on rings at radii 1.2, 2.4, ... with y = density * (6x + 6) particles each
+    'exponential': the same number of particles placed at random with an exponential surface density 
+    exp(-R / scale_length) between the innermost and outermost ring radius
+    
+    scale_length [float]: by default None [1/3 of the outermost ring radius]; scale length of 'exponential' disks
+    
+    scale_height [float]: by default 0 [flat disk]; if > 0, particles are given heights z drawn from a 
+    sech**2(z / scale_height) profile to make a thick disk, with circular velocities of a particle at that height
+    
+    random_phase [boolean]: by default False; if True, every ring is rotated by a random angle, so the particles
+    of neighbouring rings do not line up
+    
+    seed [integer]: by default None; seed of the random number generator [or a numpy Generator]
+    
+    quiet [boolean]: by default False; if True, nothing is printed
     ----------------------------------------------------------------------------------
     OUTPUT [numpy array]: particle_positions, particle_velocities, number_of_particles
     format: function returns 2, (N, 3) numpy arrays and a integer (# of particles)
@@ -33,96 +55,91 @@ def MSG_disk(number_of_rings, mass, rotation_dir, density, origin = ([[0.,0.,0.]
     def particles_per_ring(ring_number, scale_factor):
         """this function calculates the amount of particles for each ring using the equation y = 6x+6
         Using the default scale_factor of 1 will scale the number of particles per ring like TOOMRE et al. (1972)"""
-        def particle_count(i, scale_factor):
-            # outputs y = 6x + 6 for a given x
-            return int(scale_factor * (6*i + 6)) # ensures only integer amount of particles
-        
-        Num = np.zeros((ring_number, 1)) # create (x by 1) array, where x is number of rings in disk
-        Npar = np.zeros(1) # array for storing
-        for n in range(ring_number): # loop through specified amount of rings in disk
-            Num[n] = particle_count(n+1, scale_factor) # calculate number of particles for each ring
-            Npar = np.append(Npar, Num[n], 0) # append number of particles into array
-        return Npar[1:] # remove zeroth entry
+        ring = np.arange(1, ring_number + 1) # ring numbers x = 1, 2, ... 
+        return (scale_factor * (6*ring + 6)).astype(int) # ensures only integer amount of particles
     
     def init(RING_NUMB, MASS):
         """this function calculates the radius and velocity for each ring in the galaxy disk"""
-        def calc_rad(i):
-            """this function calculates the radius for a given ring assuming rings are equally spaced"""
-            radius = i * 600/500 # distance between rings [parsecs] / number of parsecs in 1 distance unit
-            return radius
-        
-        def get_velocity(RADIUS, M):
-            """this function calculates the magnitude of the velocity for a given radius"""
-            G = 1 # gravitational constant
-            M = M # mass of host galaxy
-            #calculate magnitude of velocity at given radius
-            ring_vel = np.sqrt(G * M / RADIUS) # circular keplerian orbital velocity
-            return ring_vel
-        
-        # generate radii and velocity for each ring
-        rarr = np.zeros(RING_NUMB)
-        varr = np.zeros(RING_NUMB)
-        for r in range(1, RING_NUMB + 1): # loop starts at 1 to avoid radius of 0
-            rarr[r-1] = calc_rad(r) # index starts at r-1 to overwrite 0th entry
-            varr[r-1] = get_velocity(rarr[r-1], MASS) # calculate velocity using calculated radius
+        G = 1 # gravitational constant
+        # radii start at 1 to avoid radius of 0, rings are equally spaced
+        rarr = np.arange(1, RING_NUMB + 1) * 600/500 # distance between rings [parsecs] / number of parsecs in 1 distance unit
+        varr = np.sqrt(G * MASS / rarr) # circular keplerian orbital velocity
         return rarr, varr
     
-    def galaxy(RADIUS, VELOCITY, PARTICLE_NUMBER):
-        """this function generates positions and velocities for each particle, confined to orbit in xy plane"""
-        # calculate angular spacing in radians to space each particle equally 
-        angular_spacing = (360 * np.pi)/(PARTICLE_NUMBER * 180) 
-        
-        par_arr = np.zeros((PARTICLE_NUMBER, 3)) #initialize array for storing position values
-        vel_arr = np.zeros((PARTICLE_NUMBER, 3)) #initialize array for storing velocity values
-        for N in range(PARTICLE_NUMBER): # loop through number of particles in a given ring
-            # calculate x, y positions and velocities for each particle
-            X = RADIUS * np.cos(angular_spacing * N)
-            Y = RADIUS * np.sin(angular_spacing * N)
-            Vx = - VELOCITY * np.sin(angular_spacing * N) # neg sign ensures velocity vector points in correct direction
-            Vy = VELOCITY * np.cos(angular_spacing * N)
-            # store x and y values
-            par_arr[N, 0] = X
-            par_arr[N, 1] = Y
-            vel_arr[N, 0] = Vx
-            vel_arr[N, 1] = Vy
-        return par_arr, vel_arr
+    def exponential_radii(R_MIN, R_MAX, R_D, size):
+        """this function draws radii with an exponential surface density exp(-R / R_D) between R_MIN and R_MAX
+        by inverting the cumulative distribution of R * exp(-R / R_D) on a fine grid"""
+        grid = np.linspace(R_MIN, R_MAX, 4096)
+        cdf = 1 - (1 + grid / R_D) * np.exp(-grid / R_D) # cumulative mass of an exponential disk
+        return np.interp(rng.uniform(cdf[0], cdf[-1], size), cdf, grid)
     
     # ensure values are integers
     number_of_rings = int(number_of_rings)
     
     # number of particles per ring
     PAR_PER_RING = particles_per_ring(number_of_rings, density)
-    Np = int(sum(PAR_PER_RING)) # total number of particles
+    Np = int(PAR_PER_RING.sum()) # total number of particles
 
-    rand = random.randint(0, 5) # generate integer between 0 and 6 randomly
-    if rand == 0:
-        print('total number of particles: ', Np , '\n ﾐᐠዋ ﻌ ዋᐟﾐ') # tiger
-    if rand == 1:
-        print('total number of particles: ', Np , '\n /ᐠ｡ꞈ｡ᐟ\ ᨐ') # tiny cat
-    if rand == 2:
-        print('total number of particles: ', Np , '\n /ᐠ ̥ ̮ ̥ᐟ\ฅ  ฅ/ᐠ‧̫‧ᐟ\ฅ  ฅ/ᐠ. ̫.ᐟ\ฅ') # 3 kitties
-    if rand == 3:
-        print('total number of particles: ', Np , '\n =^._.^=') # awesome cat
-    if rand == 4:
-        print('total number of particles: ', Np , '\n (๑ↀᆺↀ๑)') # cool cat
-    if rand == 5:
-        print('total number of particles: ', Np , '\n ∧,,,∧ \n( ̳•·• ̳)\n/    づ💻') # izzy's cat
+    if not quiet:
+        rand = random.randint(0, 5) # generate integer between 0 and 6 randomly
+        if rand == 0:
+            print('total number of particles: ', Np , '\n ﾐᐠዋ ﻌ ዋᐟﾐ') # tiger
+        if rand == 1:
+            print('total number of particles: ', Np , '\n /ᐠ｡ꞈ｡ᐟ\ ᨐ') # tiny cat
+        if rand == 2:
+            print('total number of particles: ', Np , '\n /ᐠ ̥ ̮ ̥ᐟ\ฅ  ฅ/ᐠ‧̫‧ᐟ\ฅ  ฅ/ᐠ. ̫.ᐟ\ฅ') # 3 kitties
+        if rand == 3:
+            print('total number of particles: ', Np , '\n =^._.^=') # awesome cat
+        if rand == 4:
+            print('total number of particles: ', Np , '\n (๑ↀᆺↀ๑)') # cool cat
+        if rand == 5:
+            print('total number of particles: ', Np , '\n ∧,,,∧ \n( ̳•·• ̳)\n/    づ💻') # izzy's cat
         
-    # generate radii and velocities for each ring
-    radii, velocities = init(number_of_rings, mass)
-
-    # set up final position array
-    final_pos = np.zeros((1, 3))
-    final_vel = np.zeros((1, 3))
-    
-    # loop through each ring to generate positions and velocities for each particle in each ring
-    for numb in range(number_of_rings):
-        XY, Vxy = galaxy(radii[numb], velocities[numb], int(PAR_PER_RING[numb])) # ensure only integer # of particles
-        final_pos = np.append(final_pos, XY, 0) # store positions
-        final_vel = np.append(final_vel, Vxy, 0) # store velocities
+    # random number generator for the optional profiles
+    rng = np.random.default_rng(seed)
+    
+    # allocate output arrays once for every particle, confined to orbit in xy plane
+    final_pos = np.zeros((Np, 3))
+    final_vel = np.zeros((Np, 3))
+    
+    if profile == 'rings':
+        # generate radii and velocities for each ring
+        radii, velocities = init(number_of_rings, mass)
+        # ring of each particle, and index of each particle within its ring
+        ring = np.repeat(np.arange(number_of_rings), PAR_PER_RING)
+        index = np.arange(Np) - np.repeat(np.cumsum(PAR_PER_RING) - PAR_PER_RING, PAR_PER_RING)
+        # calculate angular spacing in radians to space each particle of a ring equally 
+        angular_spacing = (360 * np.pi)/(np.maximum(PAR_PER_RING, 1) * 180) 
+        angle = angular_spacing[ring] * index
+        if random_phase:
+            angle = angle + rng.uniform(0, 2*np.pi, number_of_rings)[ring] # rotate each ring randomly
+        R = radii[ring]
+        V = velocities[ring]
+    elif profile == 'exponential':
+        r_min, r_max = init(number_of_rings, mass)[0][[0, -1]] # innermost and outermost ring radius
+        R_D = scale_length if scale_length is not None else r_max / 3
+        R = exponential_radii(r_min, r_max, R_D, Np)
+        angle = rng.uniform(0, 2*np.pi, Np)
+        V = np.sqrt(mass / R) # circular keplerian orbital velocity
+    else:
+        raise ValueError("ERROR: profile must be 'rings' or 'exponential' \n /ᐠ=ᆽ=ᐟ\\ <(hisss.....)")
+    
+    if scale_height > 0:
+        # thick disk: sech**2 vertical profile, by inverting its cumulative distribution (1 + tanh(z / h)) / 2;
+        # uniform draws from [-1, 1), so clip to the open interval where arctanh is finite
+        Z = scale_height * np.arctanh(rng.uniform(-1, 1, Np).clip(-1 + 1e-15, 1 - 1e-15))
+        # circular velocity around a point mass of a particle at height Z
+        V = np.sqrt(mass * R**2 / (R**2 + Z**2)**1.5)
+        final_pos[:, 2] = Z
+    
+    # calculate x, y positions and velocities for each particle
+    final_pos[:, 0] = R * np.cos(angle)
+    final_pos[:, 1] = R * np.sin(angle)
+    final_vel[:, 0] = - V * np.sin(angle) # neg sign ensures velocity vector points in correct direction
+    final_vel[:, 1] = V * np.cos(angle)
         
-    # remove 0th entry, and adjust disk rotation direction, bulge position and velocity
-    final_pos = final_pos[1:] + origin # shift positions to be centered around 'origin'
-    final_vel = rotation_dir * final_vel[1:] + velocity # shift velocities
+    # adjust disk rotation direction, bulge position and velocity
+    final_pos = final_pos + origin # shift positions to be centered around 'origin'
+    final_vel = rotation_dir * final_vel + velocity # shift velocities
     
     return final_pos, final_vel, Np # outputs positions, velocities and number of particles
@@ -1,24 +1,432 @@
-def MSG_galaxy(gal_pos, gal_vel, mass, particle_pos, particle_vel, dt, timesteps, soft_param, 
-               disk2 = None, diskvel = None):
+def _particle_buffers(N, K, dtype = float, batch = ()):
+    """this function allocates the scratch buffers used by _particle_accel for N test particles and K bulges,
+    so they can be reused every timestep instead of creating new temporary arrays
+    batch is the shape of any leading batch axes of the position arrays [ei. (B,) for B stacked simulations]"""
+    import numpy as np # computational
+    DEL = np.zeros(tuple(batch) + (N, K, 3), dtype = dtype) # separation vector from each particle to each bulge
+    G_BUF = np.zeros(tuple(batch) + (N, K), dtype = dtype) # softened inverse cube distance weighted by bulge mass
+    return DEL, G_BUF
+
+def _particle_accel(POS_GAL, POS_P, MASS, Sf, out, DEL, G_BUF):
+    """this function calculates the acceleration induced by K massive bulges onto N test particles in a single
+    broadcast (N, K) operation, writing into the preallocated 'out' (N, 3) and scratch buffers from 
+    _particle_buffers. all arrays may have the same leading batch axes [ei. (B, N, 3) and (B, K, 3)]"""
+    import numpy as np # computational
+    # gravitational constant G = 1 is folded into the bulge masses below
+    # separation vectors r_k - r_i for every particle / bulge pair, shape (N, K, 3)
+    np.subtract(POS_GAL[..., np.newaxis, :, :], POS_P[..., :, np.newaxis, :], out = DEL)
+    # squared distances, shape (N, K)
+    np.einsum('...nkj,...nkj->...nk', DEL, DEL, out = G_BUF)
+    # Plummer softened M_k / (r**2 + Sf**2)**1.5
+    G_BUF += Sf**2
+    np.power(G_BUF, -1.5, out = G_BUF)
+    G_BUF *= MASS[..., np.newaxis, :, 0]
+    # sum contributions of every bulge
+    np.einsum('...nkj,...nk->...nj', DEL, G_BUF, out = out)
+    return out
+
+def _particle_accel_reference(POS_GAL, POS_P, MASS, Sf):
+    """reference implementation of _particle_accel which loops through every test particle for exactly 2 bulges;
+    this is the original MSG_galaxy kernel and is only kept to check the vectorized kernel against"""
+    import numpy as np # computational
+    # gravitational constant
+    G = 1
+    # number of massless particles
+    N = POS_P.shape[0]
+
+    # empty 3-dimensional arrays for storing accelerations, assuming 2 massive 'bulges'
+    Aa = np.zeros((N,3))
+    Ab = np.zeros((N,3))
+
+    # calculate acceleration for each particle by looping through them
+    for i in range(len(POS_P)):
+        # galaxy a
+        delxa = POS_GAL[0, 0] - POS_P[i, 0]
+        delya = POS_GAL[0, 1] - POS_P[i, 1]
+        delza = POS_GAL[0, 2] - POS_P[i, 2] 
+        # galaxy b
+        delxb = POS_GAL[1, 0] - POS_P[i, 0]
+        delyb = POS_GAL[1, 1] - POS_P[i, 1] 
+        delzb = POS_GAL[1, 2] - POS_P[i, 2] 
+
+        ga = (delxa**2 + delya**2 + delza**2 + Sf**2)**(-1.5)
+        gb = (delxb**2 + delyb**2 + delzb**2 + Sf**2)**(-1.5) 
+        
+        # save accelerations to array
+        Aa[i, 0] += G * (delxa * ga) * MASS[0, 0]
+        Aa[i, 1] += G * (delya * ga) * MASS[0, 0]
+        Aa[i, 2] += G * (delza * ga) * MASS[0, 0]
+
+        Ab[i, 0] += G * (delxb * gb) * MASS[1, 0]
+        Ab[i, 1] += G * (delyb * gb) * MASS[1, 0]
+        Ab[i, 2] += G * (delzb * gb) * MASS[1, 0]
+
+    return np.array(Aa + Ab) # sum accelerations 
+
+def _particle_kernel(N, K, batch = (), workers = None, chunk_size = None, dtype = float):
+    """this function prepares the test particle acceleration kernel for up to N particles and K bulges, returning
+    a function force(POS_GAL, POS_P, MASS, Sf, out) with its own scratch buffers, and the thread pool it uses
+    (None if workers is None or 1; the caller must shut the pool down when done)
+    with several workers, the particles are split into chunks of chunk_size particles that are evaluated
+    concurrently [by default chunks of about 512 kB of scratch buffers, so they stay in cache]; NumPy releases 
+    the GIL inside the in-place ufuncs and einsum of _particle_accel, and every particle is calculated with 
+    exactly the same operations, so results are identical to a single thread
+    dtype is the precision of the scratch buffers, which should match the particle arrays"""
+    import numpy as np # computational
+    from concurrent.futures import ThreadPoolExecutor # thread pool
+    DEL, G_BUF = _particle_buffers(N, K, dtype, batch)
+    
+    if workers is None or workers <= 1:
+        def force(POS_GAL, POS_P, MASS, Sf, out):
+            n = POS_P.shape[-2]
+            return _particle_accel(POS_GAL, POS_P, MASS, Sf, out, DEL[..., :n, :, :], G_BUF[..., :n, :])
+        return force, None
+    
+    if chunk_size is None:
+        chunk_size = max(1024, 2**19 // (4 * np.dtype(dtype).itemsize * K)) # (K, 3) + (K,) scratch values per particle
+    pool = ThreadPoolExecutor(max_workers = workers)
+    def force(POS_GAL, POS_P, MASS, Sf, out):
+        def chunk(i):
+            # each chunk uses its own rows of the scratch buffers
+            sl = slice(i, min(i + chunk_size, POS_P.shape[-2]))
+            _particle_accel(POS_GAL, POS_P[..., sl, :], MASS, Sf, out[..., sl, :], DEL[..., sl, :, :], 
+                            G_BUF[..., sl, :])
+        # wait for all chunks, raising any error
+        for result in pool.map(chunk, range(0, POS_P.shape[-2], chunk_size)):
+            pass
+        return out
+    return force, pool
+
+def _bulge_accel(POSITION, MASS, Sf):
+    """this function calculates the gravitational acceleration between K massive particles in a vectorized 
+    pairwise (K, K) form; POSITION and MASS may have leading batch axes [ei. (B, K, 3) and (B, K, 1)]"""
+    import numpy as np # computational
+    # gravitational constant G = 1 is folded into the masses below
+    # separation vectors r_k - r_i for every pair, shape (K, K, 3); the i = k terms are 0 and add nothing
+    DEL = POSITION[..., np.newaxis, :, :] - POSITION[..., :, np.newaxis, :]
+    # Plummer softened M_k / (r**2 + Sf**2)**1.5, shape (K, K)
+    g = (np.einsum('...ikj,...ikj->...ik', DEL, DEL) + Sf**2)**(-1.5) * MASS[..., np.newaxis, :, 0]
+    # sum contributions of every other bulge
+    return np.einsum('...ikj,...ik->...ij', DEL, g)
+
+def _bulge_accel_reference(POSITION, MASS, Sf):
+    """reference implementation of _bulge_accel which loops through every pair of massive particles; this is the 
+    original MSG_galaxy accelerator and is only kept to check the vectorized version against"""
+    import numpy as np # computational
+    # gravitational constant
+    G = 1
+    # number of particles from position array
+    N = POSITION.shape[0]
+    # empty acceleration 3-dimensional array for storing accelerations
+    a = np.zeros((N,3))
+
+    # calculate acceleration for each particle
+    for i in range(N):
+        for k in range(N):
+            # vectorized form of GMm/r**2
+            delx = POSITION[k,0] - POSITION[i,0] 
+            dely = POSITION[k,1] - POSITION[i,1]
+            delz = POSITION[k,2] - POSITION[i,2]
+
+            g = (delx**2 + dely**2 + delz**2 + Sf**2)**(-1.5)
+            
+            #store each acceleration component
+            a[i, 0] += G * (delx * g) * MASS[k, 0]
+            a[i, 1] += G * (dely * g) * MASS[k, 0]
+            a[i, 2] += G * (delz * g) * MASS[k, 0]
+
+    return np.array(a)
+
+def _snapshot_steps(timesteps, save_every = 1, save_steps = None):
+    """this function returns the sorted timesteps (0 = initial state, n = after n steps) at which snapshots are 
+    stored, either every save_every timesteps or the explicit save_steps within the simulation range"""
+    import numpy as np # computational
+    if save_steps is not None:
+        snap_steps = np.unique(np.asarray(save_steps, dtype = int))
+        return snap_steps[(snap_steps >= 0) & (snap_steps <= timesteps)]
+    if int(save_every) < 1:
+        raise ValueError('ERROR: save_every must be an integer of at least 1 \n /ᐠ=ᆽ=ᐟ\\ <(hisss.....)')
+    return np.arange(0, timesteps + 1, int(save_every))
+
+def _fuse_disks(disks, dtype = float):
+    """this function concatenates a list of (positions, velocities) disk pairs into one contiguous particle state
+    of the given dtype; returns positions, velocities and the offset table, where disk d holds particles 
+    offsets[d] to offsets[d+1]"""
+    import numpy as np # computational
+    counts = [np.shape(pos)[-2] for pos, vel in disks]
+    offsets = np.concatenate(([0], np.cumsum(counts))).astype(int)
+    pos = np.concatenate([np.asarray(pos, dtype = dtype) for pos, vel in disks], axis = -2)
+    vel = np.concatenate([np.asarray(vel, dtype = dtype) for pos, vel in disks], axis = -2)
+    return pos, vel, offsets
+
+def _integrator_weights(integrator):
+    """this function returns the substep weights of the symplectic integrator: every timestep is a composition of 
+    kick-drift-kick leapfrog substeps of length weight * dt [Yoshida 1990]
+    'leapfrog': 2nd order, 1 force evaluation per timestep
+    'yoshida4' [or 'forest-ruth']: 4th order, 3 force evaluations per timestep
+    'yoshida6': 6th order, 7 force evaluations per timestep"""
+    if integrator == 'leapfrog':
+        return (1.,)
+    if integrator in ('yoshida4', 'forest-ruth'):
+        w1 = 1. / (2. - 2.**(1./3.))
+        w0 = 1. - 2. * w1
+        return (w1, w0, w1)
+    if integrator == 'yoshida6':
+        # solution A of Yoshida (1990)
+        w1, w2, w3 = -1.17767998417887, 0.235573213359357, 0.784513610477560
+        w0 = 1. - 2. * (w1 + w2 + w3)
+        return (w3, w2, w1, w0, w1, w2, w3)
+    raise ValueError("ERROR: integrator must be 'leapfrog', 'yoshida4' [or 'forest-ruth'] or 'yoshida6' \n "
+                     "/ᐠ=ᆽ=ᐟ\\ <(hisss.....)")
+
+def _phase_timer():
+    """this function returns a dictionary accumulating the seconds spent in every phase of a simulation"""
+    return {'bulge_force': 0., 'particle_force': 0., 'kick_drift': 0., 'storage': 0.}
+
+def _memory_use():
+    """this function returns the memory used by this process in bytes [resident set size], or None if it is not 
+    available on this system"""
+    import os # page size
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource # peak memory on unix systems without /proc
+        import sys # platform
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024
+    except ImportError:
+        return None
+
+def MSG_progress(info):
+    """
+    this function prints the progress of a simulation; pass it as MSG_galaxy(..., callback = MSG_progress)
+    ----------------------------------------------------------------------
+    info [dictionary]: progress information given to the callback by MSG_galaxy, see MSG_galaxy
+    =^._.^=
+    """
+    timings = info['timings']
+    total = max(sum(timings.values()), 1e-300)
+    phases = ', '.join(name + ' ' + str(int(round(100 * t / total))) + '%' for name, t in timings.items())
+    memory = '' if info['memory'] is None else ', ' + str(round(info['memory'] / 1e6, 1)) + ' MB'
+    print('step', info['step'], '/', info['timesteps'], '[' + str(round(info['steps_per_s'], 1)) + ' steps/s, ETA',
+          str(round(info['eta'], 1)) + ' s' + memory + '] (' + phases + ')')
+
+def _particle_dtype(dtype):
+    """this function checks the precision requested for the test particles and returns it as a numpy dtype"""
+    import numpy as np # computational
+    dtype = np.dtype(dtype)
+    if dtype not in (np.float32, np.float64):
+        raise ValueError('ERROR: dtype must be np.float32 or np.float64 [float] \n /ᐠ=ᆽ=ᐟ\\ <(hisss.....)')
+    return dtype
+
+def _self_gravity(particle_mass, shape, grid, soft_param, adaptive):
+    """this function returns the self_force of massive particles for _leapfrog, or None for test particles"""
+    if particle_mass is None:
+        return None
+    if adaptive:
+        raise ValueError('ERROR: massive particles are not available with adaptive timesteps \n /ᐠ=ᆽ=ᐟ\\ <(hisss.....)')
+    if len(shape) > 2:
+        raise ValueError('ERROR: massive particles only support a single simulation, not a batch of simulations '
+                         '\n /ᐠ=ᆽ=ᐟ\\ <(hisss.....)')
+    from .MSGgravity import _self_force
+    return _self_force(particle_mass, shape[0], grid, soft_param)
+
+def _leapfrog(gal_pos, gal_vel, gal_accel, mass, pos, vel, accel, dt, timesteps, soft_param, start = 0, 
+              weights = (1.,), workers = None, timer = None, self_force = None):
+    """this generator advances the bulges and the fused test particle state (positions, velocities, accelerations)
+    with a kick-drift-kick leapfrog, updating all arrays in place; it yields the number of completed steps, 
+    starting with 'start' for the current state, so the caller can read (or checkpoint) the state between steps
+    when start is 0 the initial accelerations are calculated, otherwise gal_accel and accel must hold the 
+    accelerations of the current state (ei. restored from a checkpoint)
+    weights are the substep weights of a higher order composition [see _integrator_weights]
+    workers is the number of threads evaluating test particle accelerations [see _particle_kernel]
+    the test particles are integrated in the precision of pos, vel and accel [ei. float32]
+    timer is a dictionary [see _phase_timer] in which the time spent in every phase is accumulated
+    self_force is None for massless test particles, or the self-gravity of massive particles [see _self_force]"""
+    from time import perf_counter as clock # phase timings
+    # preallocate scratch buffers for the test particle kernel
+    force, pool = _particle_kernel(pos.shape[-2], gal_pos.shape[-2], pos.shape[:-2], workers, dtype = pos.dtype)
+    timer = timer if timer is not None else _phase_timer()
+    try:
+        # calculate initial accelerations 
+        if start == 0:
+            gal_accel[:] = _bulge_accel(gal_pos, mass, soft_param)
+            force(gal_pos, pos, mass, soft_param, accel)
+            if self_force is not None:
+                gal_accel += self_force(gal_pos, pos, accel)
+        yield start
+    
+        for n in range(start, timesteps): # loop through every timestep
+            for w in weights: # loop through leapfrog substeps
+                h = w * dt # substep length
+                t0 = clock()
+                # GALAXIES
+                # calculate velocity using acceleration and 1/2 timestep
+                gal_vel += gal_accel * h/2.0
+                # drift particle
+                gal_pos += gal_vel * h
+                t1 = clock()
+                # update accelerations
+                gal_accel[:] = _bulge_accel(gal_pos, mass, soft_param)
+                t2 = clock()
+                # update velocities
+                gal_vel += gal_accel * h/2.0
+            
+                # PARTICLES
+                # calculate velocity using acceleration and 1/2 timestep
+                vel += accel * h/2.0
+                # drift particle
+                pos += vel * h
+                t3 = clock()
+                # update accelerations
+                force(gal_pos, pos, mass, soft_param, accel)
+                if self_force is not None:
+                    # self-gravity of the particles, and their pull on the bulges which completes the bulge kick
+                    bulge_accel = self_force(gal_pos, pos, accel)
+                    gal_accel += bulge_accel
+                    gal_vel += bulge_accel * h/2.0
+                t4 = clock()
+                # update velocities
+                vel += accel * h/2.0
+                timer['kick_drift'] += (t1 - t0) + (t3 - t2) + (clock() - t4)
+                timer['bulge_force'] += t2 - t1
+                timer['particle_force'] += t4 - t3
+            yield n + 1
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+def _block_leapfrog(gal_pos, gal_vel, gal_accel, mass, pos, vel, accel, dt, timesteps, soft_param, start = 0,
+                    max_level = 6, eta = .05, workers = None, timer = None):
+    """this generator advances the bulges and the fused test particle state like _leapfrog, but with adaptive 
+    power-of-two block timesteps: at the start of every timestep each particle gets the level l such that 
+    dt / 2**l <= eta * sqrt(soft_param / |acceleration|), up to max_level, and takes 2**l kick-drift-kick substeps
+    of dt / 2**l; the bulges take substeps of the smallest block timestep in use. only particles that finish a 
+    substep have their acceleration recalculated, and all particles are synchronized after every timestep
+    workers is the number of threads evaluating test particle accelerations [see _particle_kernel]
+    timer is a dictionary [see _phase_timer] in which the time spent in every phase is accumulated"""
+    import numpy as np # computational
+    from time import perf_counter as clock # phase timings
+    N, K = pos.shape[0], gal_pos.shape[0]
+    timer = timer if timer is not None else _phase_timer()
+    # preallocate scratch buffers for the test particle kernel, used for the active particles only
+    force, pool = _particle_kernel(N, K, workers = workers, dtype = pos.dtype)
+    pos_act, accel_act = np.zeros((N, 3), dtype = pos.dtype), np.zeros((N, 3), dtype = pos.dtype)
+    
+    def level(a):
+        """block timestep level for accelerations a"""
+        a_mag = np.sqrt(np.einsum('ij,ij->i', a, a)) + 1e-300 # avoid dividing by 0
+        l = np.ceil(np.log2(dt * np.sqrt(a_mag / soft_param) / eta))
+        return np.clip(l, 0, max_level).astype(int)
+    
+    try:
+        # calculate initial accelerations 
+        if start == 0:
+            gal_accel[:] = _bulge_accel(gal_pos, mass, soft_param)
+            force(gal_pos, pos, mass, soft_param, accel)
+        yield start
+    
+        for n in range(start, timesteps): # loop through every timestep
+            # assign block timesteps; the bulges use the smallest block timestep in use
+            levels = level(accel)
+            L = max(levels.max(), level(gal_accel).max())
+            h = dt / 2**L # bulge substep length
+            groups = [(2**(L - l), np.flatnonzero(levels == l)) for l in range(L + 1)]
+            groups = [(stride, idx) for stride, idx in groups if len(idx) > 0]
+        
+            for s in range(2**L): # loop through smallest substeps
+                t0 = clock()
+                # PARTICLES: start of block timestep
+                for stride, idx in groups:
+                    if s % stride == 0:
+                        # calculate velocity using acceleration and 1/2 block timestep
+                        vel[idx] += accel[idx] * (stride * h)/2.0
+                        # drift particle for the whole block timestep, since the velocity is constant until it ends
+                        pos[idx] += vel[idx] * (stride * h)
+            
+                # GALAXIES
+                # calculate velocity using acceleration and 1/2 substep
+                gal_vel += gal_accel * h/2.0
+                # drift particle
+                gal_pos += gal_vel * h
+                t1 = clock()
+                # update accelerations
+                gal_accel[:] = _bulge_accel(gal_pos, mass, soft_param)
+                t2 = clock()
+                # update velocities
+                gal_vel += gal_accel * h/2.0
+                timer['kick_drift'] += (t1 - t0) + (clock() - t2)
+                timer['bulge_force'] += t2 - t1
+            
+                # PARTICLES: end of block timestep
+                for stride, idx in groups:
+                    if (s + 1) % stride == 0:
+                        m = len(idx)
+                        t0 = clock()
+                        # update accelerations of the particles finishing their block timestep
+                        np.take(pos, idx, axis = 0, out = pos_act[:m])
+                        force(gal_pos, pos_act[:m], mass, soft_param, accel_act[:m])
+                        accel[idx] = accel_act[:m]
+                        t1 = clock()
+                        # update velocities
+                        vel[idx] += accel[idx] * (stride * h)/2.0
+                        timer['particle_force'] += t1 - t0
+                        timer['kick_drift'] += clock() - t1
+            yield n + 1
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+def _disk_list(particle_pos, particle_vel, disk2, diskvel, disks):
+    """this function collects the MSG_galaxy disk arguments into a list of labels and a list of 
+    (positions, velocities) pairs: particle_pos is labelled 'primary', disk2 'companion', followed by disks"""
+    labels, pairs = [], []
+    if particle_pos is not None:
+        labels.append('primary')
+        pairs.append((particle_pos, particle_vel))
+    if disk2 is not None:
+        labels.append('companion')
+        pairs.append((disk2, diskvel))
+    if disks is not None:
+        if isinstance(disks, dict):
+            items = list(disks.items())
+        else:
+            items = [('disk' + str(d), pair) for d, pair in enumerate(disks)]
+        for label, (pos, vel) in items:
+            labels.append(label)
+            pairs.append((pos, vel))
+    if not pairs:
+        raise ValueError('ERROR: please provide at least one disk [particle_pos or disks] \n /ᐠ=ᆽ=ᐟ\\ <(hisss.....)')
+    return labels, pairs
+
+def MSG_galaxy(gal_pos, gal_vel, mass, particle_pos = None, particle_vel = None, dt = .01, timesteps = 1000, 
+               soft_param = .1, disk2 = None, diskvel = None, disks = None, flat = True, save_every = 1, 
+               save_steps = None, full_bulges = True, store = None, checkpoint_every = None, resume = False, 
+               integrator = 'leapfrog', adaptive = False, max_level = 6, eta = .05, workers = None, dtype = float, 
+               callback = None, callback_every = 100, quiet = False, result = False, particle_mass = None, grid = 64):
     """
     [MegingSimulator:Galaxies]
     this function runs a restricted N-Body simulation given initial positions and velocities and outputs the 
     positions of each particle after n timesteps
     -----------------------------------------------------------------------------------------------------------
-    gal_pos [numpy array]: initial x,y,z positions of the two massive particles representing the galactic bulge
+    gal_pos [numpy array]: initial x,y,z positions of the K massive particles representing the galactic bulges
+    usually K = 2, but any number of bulges [ei. triple mergers] is supported
     format: np.array([[X1, Y1, Z1], [X2, Y2, Z2]])
     data type: float
-    shape: (2, 3)
+    shape: (K, 3)
     
-    gal_vel [numpy array]: initial x,y,z velocities of the two massive particles representing the galactic bulge
+    gal_vel [numpy array]: initial x,y,z velocities of the K massive particles representing the galactic bulges
     format: np.array([[Vx1, Vy1, Vz1], [Vx2, Vy2, Vz2]])
     data type: float
-    shape: (2, 3)
+    shape: (K, 3)
     
     mass [numpy array]: mass of 'galactic bulges'
     format: np.array([[M1], [M2]])
     data type: float
-    shape: (2, 1)
+    shape: (K, 1)
     
     particle_pos [numpy array]: initial x,y,z positions of each massless test particle in galactic disk
     format: np.array([[X1, Y1, Z1], [X2, Y2, Z2], ... , [Xn, Yn, Zn]])
@@ -53,153 +461,299 @@ def MSG_galaxy(gal_pos, gal_vel, mass, particle_pos, particle_vel, dt, timesteps
     format: np.array([Vx1, Vy1, Vz1], [Vx2, Vy2, Vz2], ... , [Vxm, Vym, Vzm]])
     data type: float
     shape: (M, 3)
+    
+    disks [dictionary or list]: by default None; any number of additional disks as (positions, velocities) pairs,
+    either in a dictionary with labels as keys or in a list [labelled 'disk0', 'disk1', ...]
+    all disks are integrated together as one particle array; particle_pos is labelled 'primary' and disk2 
+    'companion', so particle_pos is optional if disks are provided
+    example: disks = {'primary': (pos_p, vel_p), 'companion': (com_p, com_v), 'third': (pos_3, vel_3)}
+    
+    flat [boolean]: by default True, particle positions are returned as flat (timesteps * N + N, 3) arrays where 
+    timestep i is found at rows N*i to N*i + N; if False they are returned as (timesteps + 1, N, 3) arrays 
+    indexed by [timestep, particle]. both are views of the same buffer, so no data is copied
+    
+    save_every [integer]: by default 1; store particle positions only every save_every timesteps, starting at
+    timestep 0. the simulation still advances with the full dt resolution
+    example: save_every = 15 stores timesteps 0, 15, 30, ...
+    
+    save_steps [list of integers]: by default None; explicit list of timesteps to store, overrides save_every
+    timestep 0 is the initial state and timestep n is the state after n steps
+    example: save_steps = [0, 500, 999]
+    
+    full_bulges [boolean]: by default True, bulge positions are stored every timestep since they are cheap
+    if False, bulge positions are only stored at the same timesteps as the particles, so that index i of every 
+    output array refers to the same snapshot (recommended for MSG_plot when save_every > 1)
+    
+    store [string]: by default None; directory in which trajectories are written directly into memory-mapped 
+    .npy files (with a meta.json header of dt, soft_param, mass and particle counts) instead of being kept in 
+    memory. the returned arrays are memory-mapped, and the store can be reopened later with MSG_load
+    
+    checkpoint_every [integer]: by default None; when using a store, save positions, velocities and 
+    accelerations every checkpoint_every timesteps (and at the end) to checkpoint.npz in the store directory
+    
+    resume [boolean]: by default False; if True and the store has a checkpoint, continue the simulation from 
+    the last checkpoint, giving bit-for-bit the same result as an uninterrupted run. the other arguments must
+    be the same as for the interrupted run
+    
+    integrator [string]: by default 'leapfrog'; symplectic integration scheme
+    'leapfrog': 2nd order kick-drift-kick leapfrog, 1 force evaluation per timestep
+    'yoshida4' [or 'forest-ruth']: 4th order, 3 force evaluations per timestep; reaches the same accuracy as 
+    the leapfrog with a much larger dt [see README for a comparison]
+    'yoshida6': 6th order, 7 force evaluations per timestep
+    
+    adaptive [boolean]: by default False; if True, use leapfrog block timesteps: every timestep, each particle 
+    is given a substep of dt / 2**l, where the level l <= max_level grows with its acceleration, so only the few
+    particles close to a bulge take many small substeps [dt then becomes the largest substep, ei. dt = .04]
+    the bulges take the smallest substep in use. output snapshots are synchronized at every timestep
+    
+    max_level [integer]: by default 6; largest level of adaptive substeps, the smallest substep is dt / 2**max_level
+    
+    eta [float]: by default .05; accuracy parameter of adaptive substeps, a particle with acceleration |a| takes 
+    substeps no larger than eta * sqrt(soft_param / |a|); smaller values are more accurate
+    
+    workers [integer]: by default None; number of threads used to calculate the test particle accelerations
+    the particles are split into chunks that are evaluated at the same time on several cores; results are 
+    identical to a single thread. worth using for large disks [ei. 100,000 particles]
+    
+    dtype [numpy dtype]: by default float [float64]; precision of the test particle integration and of the 
+    stored particle snapshots. np.float32 halves the memory of the snapshots [and of a store on disk] and speeds
+    up the particle kernel, while the bulge orbits are always integrated and stored in float64; the drift this 
+    adds is far below the integration error of a typical dt [see README]
+    
+    particle_mass [float or numpy array]: by default None [massless test particles]; mass of every disk particle, 
+    or one mass for each particle of the disks in order [ei. np.concatenate((np.full(N, m1), np.full(M, m2)))]
+    massive particles attract each other and the bulges; their self-gravity is calculated with a particle-mesh 
+    solver [see MSG_self_gravity] in O(N), instead of O(N**2) for every pair. not available with adaptive 
+    timesteps or for a batch of simulations
+    
+    grid [integer]: by default 64; number of mesh cells along each axis of the particle-mesh solver, which covers 
+    all particles; forces closer than about a cell are smoothed, so larger grids are more accurate and slower
+    grid = None sums the forces of every pair directly instead, which is exact and faster for small disks
+    
+    callback [function]: by default None; function called as callback(info) every callback_every timesteps and 
+    at the last timestep, where info is a dictionary of
+    'step': number of completed timesteps, 'timesteps': total number of timesteps, 'elapsed': seconds since the 
+    simulation started, 'steps_per_s': timesteps per second, 'eta': estimated seconds left, 'timings': seconds 
+    spent in each phase {'bulge_force', 'particle_force', 'kick_drift', 'storage'}, 'memory': memory used by the 
+    process in bytes [None if not available]
+    use callback = MSG_progress to print progress
+    
+    callback_every [integer]: by default 100; number of timesteps between callbacks
+    
+    quiet [boolean]: by default False; if True, nothing is printed
+    
+    result [boolean]: by default False; if True, return a MSG_result instead of the arrays, giving views of the 
+    trajectories by disk label, snapshot, bulge and particle without copying [see MSG_result]
+    example: result = MSG_galaxy(*args, result = True); result.disk('companion')[100]
+    ------------------------------------------------------------------------------------------------------------
+    [BATCH]: every position, velocity and mass array can have an extra leading axis of length B to run B 
+    simulations with the same particle counts at once [ei. gal_pos of shape (B, 2, 3)]; every output array then
+    also has the leading B axis. see MSG_sweep for running many initial conditions
     ---------------------------------------------------------------------------
     OUTPUT [numpy array]: Bulge_1_position, Bulge_2_position, Particle_position
-    format: function returns 3, (N, 3) numpy arrays
+    format: function returns 2, (timesteps, 3) bulge arrays and 1, (timesteps * N + N, 3) particle array
+    if save_every or save_steps is used, particle arrays hold S = number of stored snapshots instead of 
+    timesteps + 1, and bulge arrays are (S, 3) if full_bulges is False
     example: bulge_a, bulge_b, particles = MSG_galaxy(*args)
     if disk2 and diskvel are provided, will output a second Particle_position array
+    in general, one bulge array is returned for each of the K bulges, followed by one particle array for each 
+    disk in the order primary, companion, disks
+    example: bulge_a, bulge_b, bulge_c, primary, companion, third = MSG_galaxy(*args, disks = {...})
+    the flat particle arrays can be reshaped to (timesteps + 1, N, 3) without copying: particles.reshape(-1, N, 3)
     =^._.^=
     """
     
     # IMPORT STATEMENTS
+    import time # progress timings
     import numpy as np #computational
     
-    # FUNCTIONS
-    def accelerator(POSITION, MASS, Sf):
-        """this function calculates the gravitational acceleration for the two massive particles"""
-        # gravitational constant
-        G = 1
-        # number of particles from position array
-        N = POSITION.shape[0]
-        # empty acceleration 3-dimensional array for storing accelerations
-        a = np.zeros((N,3))
-        del_x, del_y, del_z = [],[],[]
-
-        # calculate acceleration for each particle
-        for i in range(N):
-            for k in range(N):
-                # vectorized form of GMm/r**2
-                delx = POSITION[k,0] - POSITION[i,0] 
-                dely = POSITION[k,1] - POSITION[i,1]
-                delz = POSITION[k,2] - POSITION[i,2]
-
-                g = (delx**2 + dely**2 + delz**2 + Sf**2)**(-1.5)
-                
-                #store each acceleration component
-                a[i, 0] += G * (delx * g) * MASS[k]
-                a[i, 1] += G * (dely * g) * MASS[k]
-                a[i, 2] += G * (delz * g) * MASS[k]
-
-        return np.array(a)
-    
-    def particle_init(POS_GAL, POS_P, MASS, Sf):
-        """this function calculates the acceleration induced by a gravitational potential field onto test particles"""
-        # gravitational constant
-        G = 1
-        # number of massless particles
-        N = POS_P.shape[0]
-
-        # empty 3-dimensional arrays for storing accelerations, assuming 2 massive 'bulges'
-        Aa = np.zeros((N,3))
-        Ab = np.zeros((N,3))
-
-        del_xa, del_ya, del_za = [],[],[]
-        del_xb, del_yb, del_zb = [],[],[] 
-
-        # calculate acceleration for each particle by looping through them
-        for i in range(len(POS_P)):
-            # galaxy a
-            delxa = POS_GAL[0, 0] - POS_P[i, 0]
-            delya = POS_GAL[0, 1] - POS_P[i, 1]
-            delza = POS_GAL[0, 2] - POS_P[i, 2] 
-            # galaxy b
-            delxb = POS_GAL[1, 0] - POS_P[i, 0]
-            delyb = POS_GAL[1, 1] - POS_P[i, 1] 
-            delzb = POS_GAL[1, 2] - POS_P[i, 2] 
-
-            ga = (delxa**2 + delya**2 + delza**2 + Sf**2)**(-1.5)
-            gb = (delxb**2 + delyb**2 + delzb**2 + Sf**2)**(-1.5) 
-            
-            # save accelerations to array
-            Aa[i, 0] += G * (delxa * ga) * MASS[0, 0]
-            Aa[i, 1] += G * (delya * ga) * MASS[0, 0]
-            Aa[i, 2] += G * (delza * ga) * MASS[0, 0]
-
-            Ab[i, 0] += G * (delxb * gb) * MASS[1, 0]
-            Ab[i, 1] += G * (delyb * gb) * MASS[1, 0]
-            Ab[i, 2] += G * (delzb * gb) * MASS[1, 0]
-
-        return np.array(Aa + Ab) # sum accelerations 
-    
     # ensure values are integers
     timesteps = int(timesteps)
+    # substep weights of integration scheme
+    weights = _integrator_weights(integrator)
+    dtype = _particle_dtype(dtype)
+    if adaptive and integrator != 'leapfrog':
+        raise ValueError("ERROR: adaptive timesteps are only available for integrator = 'leapfrog' \n "
+                         "/ᐠ=ᆽ=ᐟ\\ <(hisss.....)")
+    if int(callback_every) < 1:
+        raise ValueError('ERROR: callback_every must be an integer of at least 1 \n /ᐠ=ᆽ=ᐟ\\ <(hisss.....)')
     
-    # initialize position arrays for plotting
-    pos_arr1, pos_arr2 = np.zeros((timesteps, 3)), np.zeros((timesteps, 3))
-    pos_arr1[0], pos_arr2[0] = gal_pos[0], gal_pos[1]
-    particle_arr = particle_pos
-
+    # timesteps at which particle positions are stored; timestep 0 is the initial state
+    snap_steps = _snapshot_steps(timesteps, save_every, save_steps)
+    # store_snap[n] is True if the state after n steps is stored
+    store_snap = np.zeros(timesteps + 1, dtype = bool)
+    store_snap[snap_steps] = True
+    S = len(snap_steps) # number of stored snapshots
     
-    # calculate initial accelerations 
-    gal_accel = accelerator(gal_pos, mass, soft_param)
-    particle_accel = particle_init(gal_pos, particle_pos, mass, soft_param)
+    # state of the simulation, updated in place; all disks are fused into one contiguous particle array where
+    # disk d holds particles offsets[d] to offsets[d+1]
+    gal_accel = np.zeros(gal_pos.shape)
+    disk_labels, disk_pairs = _disk_list(particle_pos, particle_vel, disk2, diskvel, disks)
+    pos, vel, offsets = _fuse_disks(disk_pairs, dtype)
+    accel = np.zeros(pos.shape, dtype = dtype)
+    D = len(disk_pairs) # number of disks
     
-    # check if companion galaxy has test particles
-    if disk2 is not None: 
-        # calculate initial accelerations for second galaxy
-        disk_accel = particle_init(gal_pos, disk2, mass, soft_param)
-        disk2_arr = disk2
+    # allocate trajectory buffers once; bulges are indexed by [timestep, bulge] (timestep 0 is the initial state)
+    # or by [snapshot, bulge] and particles by [snapshot, particle], after any leading batch axes
+    batch = gal_pos.shape[:-2]
+    bulge_rows = timesteps + 1 if full_bulges else S
+    shapes = {'bulges': batch + (bulge_rows,) + gal_pos.shape[-2:]}
+    dtypes = {'bulges': float} # bulge tracks are always float64, particle snapshots use dtype
+    for d in range(D):
+        shapes['disk' + str(d)] = batch + (S, int(offsets[d+1] - offsets[d]), 3)
+        dtypes['disk' + str(d)] = dtype
+    start = 0 # timestep to start simulation from
+    if store is not None and batch:
+        raise ValueError('ERROR: trajectory stores only support a single simulation, not a batch of simulations' 
+                         ' \n /ᐠ=ᆽ=ᐟ\\ <(hisss.....)')
+    if adaptive and batch:
+        raise ValueError('ERROR: adaptive timesteps only support a single simulation, not a batch of simulations' 
+                         ' \n /ᐠ=ᆽ=ᐟ\\ <(hisss.....)')
+    if result and batch:
+        raise ValueError('ERROR: result only supports a single simulation, not a batch of simulations' 
+                         ' \n /ᐠ=ᆽ=ᐟ\\ <(hisss.....)')
+    self_force = _self_gravity(particle_mass, pos.shape, grid, soft_param, adaptive)
+    if store is None:
+        arrays = {name: np.zeros(shape, dtype = dtypes[name]) for name, shape in shapes.items()}
+    else:
+        # write trajectories directly into memory-mapped files
+        from .MSGstore import _store_create, _store_checkpoint, _store_resume
+        meta = {'dt': float(dt), 'soft_param': float(soft_param), 'mass': np.asarray(mass, dtype = float).tolist(),
+                'timesteps': timesteps, 'particle_counts': np.diff(offsets).tolist(), 'labels': disk_labels,
+                'snap_steps': snap_steps.tolist(), 'full_bulges': bool(full_bulges), 'integrator': integrator,
+                'adaptive': [float(max_level), float(eta)] if adaptive else False, 'dtype': dtype.name,
+                'self_gravity': None}
+        if self_force is not None:
+            meta['self_gravity'] = {'particle_mass': np.asarray(particle_mass, dtype = float).tolist(), 'grid': grid}
+        ck = _store_resume(store) if resume else None
+        arrays = _store_create(store, meta, shapes, resume = ck is not None, dtypes = dtypes)
+        if ck is not None:
+            # restore positions, velocities and accelerations from the last checkpoint
+            start = int(ck['step'])
+            gal_pos[:], gal_vel[:], gal_accel[:] = ck['gal_pos'], ck['gal_vel'], ck['gal_accel']
+            pos[:], vel[:], accel[:] = ck['pos'], ck['vel'], ck['accel']
+            if not quiet:
+                print('resuming simulation from timestep', start)
+    bulge_arr = arrays['bulges']
+    disk_arrs = [arrays['disk' + str(d)] for d in range(D)]
     
-    print('simulation running....  /ᐠ –ꞈ –ᐟ\<[pls be patient]')
+    if not quiet:
+        print('simulation running....  /ᐠ –ꞈ –ᐟ\<[pls be patient]')
     # simulation code
-    for n in range(timesteps): # loop through every timestep
-                         
-        # GALAXIES
-        # calculate velocity using acceleration and 1/2 timestep
-        gal_vel += gal_accel * dt/2.0
-
-        # drift particle
-        gal_pos += gal_vel * dt
+    snap = np.searchsorted(snap_steps, start) # index of next snapshot to store
+    timer = _phase_timer() # seconds spent in every phase
+    t_start = time.perf_counter()
+    if adaptive:
+        steps = _block_leapfrog(gal_pos, gal_vel, gal_accel, mass, pos, vel, accel, dt, timesteps, soft_param, start,
+                                max_level, eta, workers, timer)
+    else:
+        steps = _leapfrog(gal_pos, gal_vel, gal_accel, mass, pos, vel, accel, dt, timesteps, soft_param, start, 
+                          weights, workers, timer, self_force)
+    for n in steps:
+        t0 = time.perf_counter()
+        # store bulge positions from timestep into array
+        if full_bulges:
+            bulge_arr[..., n, :, :] = gal_pos
         
-        # store positions from timestep into array
-        pos_arr1[n], pos_arr2[n] = gal_pos[0], gal_pos[1] 
+        # store positions from timestep into array if it is a requested snapshot
+        if store_snap[n]:
+            if not full_bulges:
+                bulge_arr[..., snap, :, :] = gal_pos
+            for d, disk_arr in enumerate(disk_arrs):
+                disk_arr[..., snap, :, :] = pos[..., offsets[d]:offsets[d+1], :]
+            snap += 1
         
-        # update accelerations
-        gal_accel = accelerator(gal_pos, mass, soft_param)
-    
-        # update velocities
-        gal_vel += gal_accel * dt/2.0
+        # save simulation state so the run can be resumed
+        if store is not None and ((checkpoint_every and n > start and n % checkpoint_every == 0) 
+                                  or n == timesteps):
+            state = {'step': n, 'gal_pos': gal_pos, 'gal_vel': gal_vel, 'gal_accel': gal_accel, 
+                     'pos': pos, 'vel': vel, 'accel': accel}
+            _store_checkpoint(store, arrays, state)
+        timer['storage'] += time.perf_counter() - t0
         
-        # PARTICLES
-        # calculate velocity using acceleration and 1/2 timestep
-        particle_vel += particle_accel * dt/2.0
+        # report progress
+        if callback is not None and n > start and (n % callback_every == 0 or n == timesteps):
+            elapsed = time.perf_counter() - t_start
+            steps_per_s = (n - start) / max(elapsed, 1e-300)
+            callback({'step': n, 'timesteps': timesteps, 'elapsed': elapsed, 'steps_per_s': steps_per_s, 
+                      'eta': (timesteps - n) / steps_per_s, 'timings': dict(timer), 'memory': _memory_use()})
     
-        # drift particle
-        particle_pos += particle_vel * dt
+    if not quiet:
+        print('simulation complete [yay!!! (ﾐΦ ﻌ Φﾐ)✿ *ᵖᵘʳʳ*]')
+    # copy final state back into the input disk arrays, so they are updated in place like gal_pos and gal_vel
+    for d, (p_in, v_in) in enumerate(disk_pairs):
+        if isinstance(p_in, np.ndarray) and isinstance(v_in, np.ndarray):
+            p_in[...] = pos[..., offsets[d]:offsets[d+1], :]
+            v_in[...] = vel[..., offsets[d]:offsets[d+1], :]
+    if result:
+        from .MSGresult import MSG_result
+        return MSG_result(bulge_arr, disk_arrs, disk_labels, snap_steps, full_bulges, store, dt, mass, soft_param)
+    # full resolution bulge tracks are output starting after the first timestep
+    if full_bulges:
+        bulge_arr = bulge_arr[..., 1:, :, :]
+    bulge_arrs = [bulge_arr[..., k, :] for k in range(gal_pos.shape[-2])]
+    # flatten particle buffers to (S * N, 3) views for slicing with N*step offsets
+    if flat:
+        disk_arrs = [disk_arr.reshape(batch + (-1, 3)) for disk_arr in disk_arrs]
+    # output position arrays; 1 for each bulge, and 1 for each disk
+    return tuple(bulge_arrs + disk_arrs)
 
-        # store positions from timestep into array
-        particle_arr = np.append(particle_arr, particle_pos, 0)
+def MSG_galaxy_iter(gal_pos, gal_vel, mass, particle_pos = None, particle_vel = None, dt = .01, timesteps = 1000, 
+                    soft_param = .1, disk2 = None, diskvel = None, disks = None, save_every = 1, save_steps = None,
+                    integrator = 'leapfrog', adaptive = False, max_level = 6, eta = .05, workers = None, dtype = float,
+                    particle_mass = None, grid = 64):
+    """
+    [MegingSimulator:Galaxies]
+    this generator runs the same restricted N-Body simulation as MSG_galaxy, but instead of storing the whole
+    history it yields the current positions snapshot by snapshot while the simulation is running, so memory 
+    use stays constant no matter how many timesteps are run
+    -----------------------------------------------------------------------------------------------------------
+    gal_pos, gal_vel, mass, particle_pos, particle_vel, dt, timesteps, soft_param, disk2, diskvel, disks, 
+    integrator, adaptive, max_level, eta, workers, dtype, particle_mass, grid: see MSG_galaxy; gal_pos and gal_vel are 
+    updated in place as the simulation advances
     
-        # update accelerations
-        particle_accel = particle_init(gal_pos, particle_pos, mass, soft_param)
+    save_every [integer]: by default 1; yield every save_every timesteps, starting at timestep 0
     
-        # update velocities
-        particle_vel += particle_accel * dt/2.0
-        
-        # check if companion galaxy has particles
-        if disk2 is not None: 
-            # repeat above calculations onto companion disk particles
-            diskvel += disk_accel * dt/2.0 # calculate velocities
-            disk2 += diskvel * dt # calculate positions
-            disk2_arr = np.append(disk2_arr, disk2, 0) # store positions
-            disk_accel = particle_init(gal_pos, disk2, mass, soft_param) # update accelerations
-            diskvel += disk_accel * dt/2.0 # update velocity
-    
-    print('simulation complete [yay!!! (ﾐΦ ﻌ Φﾐ)✿ *ᵖᵘʳʳ*]')
-    # output position arrays
-    if disk2 is not None:
-        # if companion galaxy has stars, output 4 position arrays; 1 for each bulge, and 1 for each disk
-        return pos_arr1, pos_arr2, particle_arr, disk2_arr
+    save_steps [list of integers]: by default None; explicit list of timesteps to yield, overrides save_every
+    ---------------------------------------------------------------------------
+    OUTPUT [tuple]: step, Bulge_positions, Particle_position
+    format: yields an integer timestep (0 = initial state) with a (K, 3) bulge array and a (N, 3) particle array
+    example: for step, bulges, particles in MSG_galaxy_iter(*args):
+    if disk2 and diskvel are provided, will also yield a second (M, 3) Particle_position array, and one more
+    array for each disk in disks
+    the yielded arrays are views of the live simulation state which is overwritten by the next step;
+    copy them [ei. particles.copy()] if they need to be kept
+    =^._.^=
+    """
+    
+    # IMPORT STATEMENTS
+    import numpy as np #computational
+    
+    # ensure values are integers
+    timesteps = int(timesteps)
+    dtype = _particle_dtype(dtype)
+    
+    if adaptive and integrator != 'leapfrog':
+        raise ValueError("ERROR: adaptive timesteps are only available for integrator = 'leapfrog' \n "
+                         "/ᐠ=ᆽ=ᐟ\\ <(hisss.....)")
+    
+    # store_snap[n] is True if the state after n steps is yielded
+    store_snap = np.zeros(timesteps + 1, dtype = bool)
+    store_snap[_snapshot_steps(timesteps, save_every, save_steps)] = True
+    
+    # fuse all disks into one particle array, and make a view of each disk
+    disk_labels, disk_pairs = _disk_list(particle_pos, particle_vel, disk2, diskvel, disks)
+    pos, vel, offsets = _fuse_disks(disk_pairs, dtype)
+    views = tuple(pos[..., offsets[d]:offsets[d+1], :] for d in range(len(disk_pairs)))
+    self_force = _self_gravity(particle_mass, pos.shape, grid, soft_param, adaptive)
+    
+    if adaptive:
+        steps = _block_leapfrog(gal_pos, gal_vel, np.zeros(gal_pos.shape), mass, pos, vel, np.zeros(pos.shape, dtype), dt, 
+                                timesteps, soft_param, max_level = max_level, eta = eta, workers = workers)
     else:
-        # if companion galaxy does not have stars, output one less array
-        return pos_arr1, pos_arr2, particle_arr
\ No newline at end of file
+        steps = _leapfrog(gal_pos, gal_vel, np.zeros(gal_pos.shape), mass, pos, vel, np.zeros(pos.shape, dtype), dt, 
+                          timesteps, soft_param, weights = _integrator_weights(integrator), workers = workers,
+                          self_force = self_force)
+    for n in steps:
+        if store_snap[n]:
+            yield (n, gal_pos) + views
@@ -0,0 +1,140 @@
+def _self_accel_reference(pos, particle_mass, soft_param, chunk_size = 1024):
+    """reference implementation of the self-gravity of the particles by direct summation over every pair,
+    O(N**2); chunks of particles are summed at once to bound the (chunk, N, 3) scratch memory"""
+    import numpy as np # computational
+    pos = np.asarray(pos, dtype = float)
+    m = np.broadcast_to(np.asarray(particle_mass, dtype = float), pos.shape[:1])
+    out = np.zeros(pos.shape)
+    for start in range(0, len(pos), chunk_size):
+        # separation vectors r_j - r_i, shape (chunk, N, 3); the i = j terms are 0
+        DEL = pos[np.newaxis, :, :] - pos[start:start + chunk_size, np.newaxis, :]
+        g = (np.einsum('inj,inj->in', DEL, DEL) + soft_param**2)**(-1.5) * m
+        out[start:start + chunk_size] = np.einsum('inj,in->ij', DEL, g)
+    return out
+
+def _bulge_accel_particles(gal_pos, pos, particle_mass, soft_param):
+    """this function calculates the acceleration of the K bulges by the N massive particles, (K, 3), the reaction
+    of the particle accelerations by the bulges in _particle_accel"""
+    import numpy as np # computational
+    DEL = pos[np.newaxis, :, :] - gal_pos[:, np.newaxis, :] # (K, N, 3)
+    g = (np.einsum('knj,knj->kn', DEL, DEL) + soft_param**2)**(-1.5) * particle_mass
+    return np.einsum('knj,kn->kj', DEL, g)
+
+def _pm_green(grid, cell, soft_param):
+    """this function returns the Fourier transform of the Plummer softened Green's function -1 / (r**2 + Sf**2)**.5
+    on a zero-padded (2 grid)**3 mesh, so the periodic convolution of the FFT gives the isolated potential; the
+    Green's function is even, so its transform is real [and kept in float32 like the mesh transforms]"""
+    import numpy as np # computational
+    # distances of the padded mesh points to the origin, wrapped around so negative offsets are at the end
+    d = np.arange(2 * grid)
+    d = np.minimum(d, 2 * grid - d) * cell
+    r2 = d[:, np.newaxis, np.newaxis]**2 + d[np.newaxis, :, np.newaxis]**2 + d[np.newaxis, np.newaxis, :]**2
+    return np.fft.rfftn(-1 / np.sqrt(r2 + soft_param**2)).real.astype(np.float32)
+
+def _pm_solver(grid = 64, soft_param = .1):
+    """this function returns accel(pos, particle_mass, out), which writes the self-gravity of the particles into
+    out with a particle-mesh solver: cloud in cell deposit of the masses on a grid**3 mesh around the particles,
+    potential by FFT convolution with the isolated Green's function, accelerations by central differences of the
+    potential interpolated back to the particles with the same cloud in cell weights; O(N + grid**3 log grid)
+    the cell size only takes a few discrete values [steps of 25%] as the particles spread out, so the transformed
+    Green's functions are cached"""
+    import numpy as np # computational
+    greens = {} # transformed Green's functions by cell size level
+    base = [] # cell size of level 0, set by the first call
+
+    def accel(pos, particle_mass, out):
+        pos = np.asarray(pos, dtype = float)
+        lo, hi = pos.min(axis = 0), pos.max(axis = 0)
+        # smallest cell size level whose mesh holds every particle 2 cells away from the edges, where the
+        # gradient of the potential is one sided
+        need = max(float((hi - lo).max()), soft_param) / (grid - 5)
+        if not base:
+            base.append(need)
+        level = int(np.ceil(np.log(need / base[0]) / np.log(1.25) - 1e-9))
+        cell = base[0] * 1.25**level
+        if level not in greens:
+            if len(greens) > 4:
+                greens.pop(next(iter(greens))) # keep the most recent few
+            greens[level] = _pm_green(grid, cell, soft_param)
+        origin = (lo + hi) / 2 - grid * cell / 2
+
+        # CLOUD IN CELL WEIGHTS of the 8 mesh points around every particle
+        u = (pos - origin) / cell
+        i = np.floor(u).astype(np.intp)
+        f = u - i
+        corners = []
+        for c in range(8):
+            dx, dy, dz = c >> 2, (c >> 1) & 1, c & 1
+            w = ((f[:, 0] if dx else 1 - f[:, 0]) * (f[:, 1] if dy else 1 - f[:, 1]) *
+                 (f[:, 2] if dz else 1 - f[:, 2]))
+            corners.append((((i[:, 0] + dx) * grid + i[:, 1] + dy) * grid + i[:, 2] + dz, w))
+
+        # MASS DEPOSIT on the mesh
+        mesh = np.zeros(grid**3)
+        m = np.broadcast_to(np.asarray(particle_mass, dtype = float), pos.shape[:1])
+        for index, w in corners:
+            mesh += np.bincount(index, w * m, minlength = grid**3)
+
+        # POTENTIAL on the mesh, by single precision FFTs one axis at a time; the zero padding is added by each
+        # transform [n = 2 grid] and only the unpadded part of the inverse is kept, which skips the transforms 
+        # of the empty half of every axis
+        F = np.fft.rfft(mesh.reshape((grid,) * 3).astype(np.float32), 2 * grid, axis = 2)
+        F = np.fft.fft(np.fft.fft(F, 2 * grid, axis = 1), 2 * grid, axis = 0)
+        F *= greens[level]
+        F = np.fft.ifft(np.fft.ifft(F, axis = 0)[:grid], axis = 1)[:, :grid]
+        phi = np.fft.irfft(F, 2 * grid, axis = 2)[:, :, :grid]
+        out[...] = 0
+        # ACCELERATIONS by central differences, interpolated to the particles
+        for j, a in enumerate(np.gradient(phi.astype(float), cell)):
+            a = a.ravel()
+            for index, w in corners:
+                out[:, j] -= w * a[index]
+        return out
+    return accel
+
+def _self_force(particle_mass, n_particles, grid, soft_param):
+    """this function returns self_force(gal_pos, pos, accel) for the leapfrog integrators, which adds the
+    self-gravity of the massive particles to accel and returns the (K, 3) acceleration of the bulges by the
+    particles; particle_mass is a single mass or one mass for each of the n_particles fused particles, and grid 
+    is the grid size of the particle-mesh solver or None for direct summation"""
+    import numpy as np # computational
+    m = np.asarray(particle_mass, dtype = float)
+    if m.ndim > 1 or (m.ndim == 1 and len(m) != n_particles):
+        raise ValueError('ERROR: particle_mass must be a single mass or one mass for each of the ' + str(n_particles)
+                         + ' particles \n /ᐠ=ᆽ=ᐟ\\ <(hisss.....)')
+    if grid is None:
+        solver = lambda pos, m, out: _self_accel_reference(pos, m, soft_param)
+    else:
+        solver = _pm_solver(int(grid), soft_param)
+    buffer = np.zeros((n_particles, 3))
+
+    def self_force(gal_pos, pos, accel):
+        accel += solver(pos, m, buffer)
+        return _bulge_accel_particles(gal_pos, pos, m, soft_param)
+    return self_force
+
+def MSG_self_gravity(pos, particle_mass, soft_param = .1, grid = 64, direct = False):
+    """
+    this function calculates the accelerations of massive disk particles by each other [the self-gravity used by
+    MSG_galaxy(..., particle_mass = ...)], with a particle-mesh solver or by direct summation
+    ----------------------------------------------------------------------
+    pos [numpy array]: (N, 3) particle positions
+
+    particle_mass [float or numpy array]: mass of every particle, or (N,) masses
+
+    soft_param [float]: by default .1; Plummer softening parameter
+
+    grid [integer]: by default 64; number of mesh cells along each axis of the particle-mesh solver; larger grids
+    are more accurate and slower
+
+    direct [boolean]: by default False; if True, sum the forces of every pair directly instead [O(N**2), only
+    for small N or to check the accuracy of the particle-mesh solver]
+    ----------------------------------------------------------------------------------
+    OUTPUT [numpy array]: (N, 3) accelerations
+    example: a = MSG_self_gravity(pos_p, .001, grid = 128); a_ref = MSG_self_gravity(pos_p, .001, direct = True)
+    =^._.^=
+    """
+    import numpy as np # computational
+    if direct:
+        return _self_accel_reference(pos, particle_mass, soft_param)
+    return _pm_solver(int(grid), soft_param)(pos, particle_mass, np.zeros(np.shape(pos)))
@@ -0,0 +1,174 @@
+def _pipeline_buffers(slot_names, layout, create = False):
+    """this function creates [or attaches to] the shared memory snapshot buffers of MSG_pipeline, returning the
+    shared memory blocks and, for every slot, the list of numpy views [bulges, disk1, disk2, ...] into it
+    layout is the list of (shape, dtype) of the arrays of a snapshot"""
+    import numpy as np # computational
+    from multiprocessing import shared_memory # buffers shared by the processes
+    sizes = [int(np.prod(shape)) * np.dtype(dtype).itemsize for shape, dtype in layout]
+    blocks, slots = [], []
+    for name in slot_names:
+        if create:
+            block = shared_memory.SharedMemory(create = True, size = max(sum(sizes), 1))
+        else:
+            block = shared_memory.SharedMemory(name = name)
+        offsets = np.cumsum([0] + sizes)
+        slots.append([np.ndarray(shape, dtype, buffer = block.buf, offset = int(offsets[i]))
+                      for i, (shape, dtype) in enumerate(layout)])
+        blocks.append(block)
+    return blocks, slots
+
+def _pipeline_producer(args, kwargs, slot_names, layout, free, full):
+    """this function runs the simulation process of MSG_pipeline: every snapshot yielded by MSG_galaxy_iter is
+    copied into a free shared buffer and its slot number is put in the full queue; waiting for a free slot holds
+    the simulation back when the consumer is slower [backpressure]. a None [or the exception of a failed
+    simulation] marks the end, and a None in the free queue stops the simulation early"""
+    from .MSGgalaxy import MSG_galaxy_iter
+    blocks, slots = _pipeline_buffers(slot_names, layout)
+    try:
+        snapshots = MSG_galaxy_iter(*args, **kwargs)
+        for step, *arrays in snapshots:
+            slot = free.get()
+            if slot is None:
+                break
+            for out, arr in zip(slots[slot], arrays):
+                out[...] = arr
+            full.put((step, slot))
+        snapshots.close() # shuts down the worker threads of the simulation
+        full.put(None)
+    except BaseException as error:
+        full.put(error)
+    finally:
+        del slots # release the views before closing the shared memory
+        for block in blocks:
+            try:
+                block.close()
+            except BufferError:
+                pass
+
+def MSG_pipeline(gal_pos, gal_vel, mass, particle_pos = None, particle_vel = None, filename = 'merger.mp4',
+                 consumer = None, queue_size = 4, fps = 30, tails = None, lim = None, dpi = 100, quiet = False,
+                 **kwargs):
+    """
+    this function simulates and animates [or analyzes] a merger at the same time: the simulation runs in a
+    separate process and passes every snapshot through a queue of queue_size snapshots in shared memory to the
+    animation, which is drawn in this process while the next snapshots are simulated. when the queue is full the
+    simulation waits, so memory stays bounded, and on 2 or more cores the total time is close to the longer of
+    the simulation and the animation instead of their sum
+    ---------------------------------------------------------------------------
+    gal_pos, gal_vel, mass, particle_pos, particle_vel: see MSG_galaxy; the simulation runs in another process,
+    so unlike MSG_galaxy the input arrays are not updated
+
+    filename [string]: by default 'merger.mp4'; output file of the animation, see MSG_animate
+
+    consumer [function]: by default None; instead of animating, call consumer(step, bulges, disk1, disk2, ...)
+    with every snapshot, ei. to analyze or save it; the arrays are reused for later snapshots, so copy them if
+    they need to be kept
+
+    queue_size [integer]: by default 4; number of simulated snapshots waiting for the animation at most
+
+    fps, tails, dpi, quiet: see MSG_animate
+
+    lim [float or list]: by default None; axes limits, see MSG_animate. the later snapshots are not known when
+    the first frame is drawn, so by default the limits are a cube twice the extent of the first snapshot
+
+    [**kwargs]:
+    dt, timesteps, soft_param, disk2, diskvel, disks, save_every, save_steps, integrator, adaptive, max_level,
+    eta, workers, dtype, particle_mass, grid: simulation arguments, see MSG_galaxy_iter
+    elev, azim [float / integer]: camera viewing angles, see MSG_plot
+    -------------------------------------------------------------------------------------------------------------
+    OUTPUT [string or list]: filename of the animation, or the list of values returned by consumer
+    example: MSG_pipeline(pos, vel, mas, pos_p, vel_p, filename = 'merger.mp4', dt = .01, timesteps = 5000,
+                          soft_param = .1, disk2 = com_p, diskvel = com_v, save_every = 10, lim = 30)
+    on windows and macOS, call it from a script under if __name__ == '__main__':
+    =^._.^=
+    """
+    import queue # empty queue error
+    import numpy as np # computational
+    import multiprocessing # simulation process
+    from .MSGgalaxy import _disk_list, _particle_dtype
+
+    # default camera viewing angles
+    elev = kwargs.pop('elev', 45) # z viewing angle (0 = edge on; 90 = Bird's eye view)
+    azim = kwargs.pop('azim', 90) # xy plane rotation angle
+    if consumer is None:
+        from .MSGplot import _check_writer
+        _check_writer(filename)
+
+    # shapes of the bulge and disk arrays of a snapshot
+    disk_pairs = _disk_list(particle_pos, particle_vel, kwargs.get('disk2'), kwargs.get('diskvel'),
+                            kwargs.get('disks'))[1]
+    dtype = _particle_dtype(kwargs.get('dtype', float))
+    layout = [(np.shape(gal_pos), np.dtype(float))] + [(np.shape(p), dtype) for p, v in disk_pairs]
+    # queue_size snapshots in the queue, one being filled by the simulation and one being used here
+    blocks, slots = _pipeline_buffers([None] * (queue_size + 2), layout, create = True)
+    ctx = multiprocessing.get_context()
+    free, full = ctx.Queue(), ctx.Queue(maxsize = queue_size)
+    for slot in range(len(slots)):
+        free.put(slot)
+    producer = ctx.Process(target = _pipeline_producer, daemon = True,
+                           args = ((gal_pos, gal_vel, mass, particle_pos, particle_vel), kwargs,
+                                   [block.name for block in blocks], layout, free, full))
+
+    def received():
+        """yield the snapshots of the simulation process in order, freeing each slot when the next is asked for"""
+        while True:
+            item = full.get()
+            if item is None:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            step, slot = item
+            yield step, slots[slot]
+            free.put(slot)
+
+    if not quiet:
+        print('simulating and animating....  /ᐠ –ꞈ –ᐟ\\<[pls be patient]')
+    producer.start()
+    try:
+        if consumer is not None:
+            output = [consumer(step, *arrays) for step, arrays in received()]
+        else:
+            import matplotlib.pyplot as plt
+            from .MSGplot import _animation, _frame_limits, _write_frames
+            track = [] # positions of the first bulge at every received snapshot, for the tails
+
+            def frame(item):
+                step, arrays = item
+                if len(track) == 0 or track[-1][0] != step:
+                    track.append((step, arrays[0][0].copy()))
+                trail = np.array([p for s, p in track[:-1]]).reshape(-1, 3)
+                return arrays[0][0], arrays[0][1], trail, arrays[1:]
+
+            items = received()
+            first = next(items)
+            if lim is None:
+                # a cube twice the largest extent of the first snapshot, about its center
+                box = np.array(_frame_limits(first[1][0], first[1][1:]))
+                half = (box[:, 1] - box[:, 0]).max()
+                lim = [[c - half, c + half] for c in box.mean(axis = 1)]
+            fig, update = _animation(frame, first, _frame_limits(None, None, lim), tails, dpi, elev, azim)
+
+            def steps():
+                yield first
+                yield from items
+            _write_frames(fig, update, steps(), filename, fps, dpi)
+            plt.close(fig)
+            output = filename
+    finally:
+        # stop the simulation if the animation failed, taking its snapshots until it reads the stop signal
+        free.put(None)
+        while producer.is_alive():
+            try:
+                full.get(timeout = .1)
+            except queue.Empty:
+                pass
+        producer.join()
+        for block in blocks:
+            try:
+                block.close()
+            except BufferError:
+                pass # arrays still refer to the buffer, it is freed with them
+            block.unlink()
+    if not quiet:
+        print('pipeline complete [yay!!! (ﾐΦ ﻌ Φﾐ)✿ *ᵖᵘʳʳ*]')
+    return output
@@ -1,5 +1,29 @@
-def MSG_plot(gal_posA, gal_posB, par_posA, particle_Na, step, par_posB = None, particle_Nb = None, tails = None,
-             **kwargs):
+def _plot_axes(elev, azim, pane_color = (1.0, 1.0, 1.0, 1.0), dpi = 100):
+    """this function creates the 10 x 10 inch figure and formatted 3d axes used by MSG_plot and MSG_animate, 
+    viewed from the elev and azim camera angles, and returns the figure and axes"""
+    import matplotlib.pyplot as plt
+    from mpl_toolkits import mplot3d
+
+    fig = plt.figure(figsize=(10,10), dpi = dpi) # create figure
+    ax = plt.axes(projection='3d') # 3d plot
+
+    # formatting
+    plt.rcParams['font.family'] = 'sans-serif' # set font
+    # set border color
+    ax.xaxis.set_pane_color(pane_color)
+    ax.yaxis.set_pane_color(pane_color)
+    ax.zaxis.set_pane_color(pane_color)
+    
+    # set view angles
+    ax.view_init(elev = elev, azim = azim)
+    # set lables
+    ax.set_xlabel('\u03A7')
+    ax.set_ylabel('\u03A5')
+    ax.set_zlabel('Z')
+    return fig, ax
+
+def MSG_plot(gal_posA, gal_posB = None, par_posA = None, particle_Na = None, step = None, par_posB = None, 
+             particle_Nb = None, tails = None, quiet = False, **kwargs):
     """this function plots the positions of all particles at a given timestep
     ---------------------------------------------------------------------------
     gal_posA [numpy array]: outputed x,y,z positions for companion galaxy bulge 
@@ -24,9 +48,17 @@ def MSG_plot(gal_posA, gal_posB, par_posA, particle_Na, step, par_posB = None, p
     
     particle_Nb [integer]: number of particles in companion galaxy disk
     
+    [TRAJECTORY STORE]: instead of arrays, gal_posA can be the directory of a trajectory store written by 
+    MSG_galaxy(..., store = path); only the plotted step is read from disk and particle counts are read from the
+    store, so only step needs to be given. step is the snapshot index [ei. step = 10 with save_every = 15 plots
+    timestep 150]; a MSG_result [see MSG_result] can be given the same way
+    example: MSG_plot('merger_run', step = 10, tails = True)
+    
     tails [boolean]: if True, will plot companion bulge trail showing motion through space, starting at 
     timestep = 0 to timestep = step
     
+    quiet [boolean]: by default False; if True, nothing is printed
+    
     [**kwargs]:
     elev [float / integer]: sets z height camera viewing angle; can be float or integer
     0 = edge on; 90 = bird's eye view
@@ -40,8 +72,8 @@ def MSG_plot(gal_posA, gal_posB, par_posA, particle_Na, step, par_posB = None, p
     """
     
     # import plotting packages
+    import numpy as np # computational
     import matplotlib.pyplot as plt
-    from mpl_toolkits import mplot3d
 
     # default camera viewing angles
     elev = 45 # z viewing angle (0 = edge on; 90 = Bird's eye view)
@@ -52,15 +84,34 @@ def MSG_plot(gal_posA, gal_posB, par_posA, particle_Na, step, par_posB = None, p
         elev = kwargs['elev']
     if ('azim') in kwargs:
         azim = kwargs['azim']
+    
+    # make sure step is integer
+    step = int(step)
+    # index of the bulge positions to plot
+    bulge_step = step
+    
+    # read snapshot from trajectory store or result
+    from .MSGresult import _as_result
+    result = _as_result(gal_posA)
+    if result is not None:
+        bulges, trail, disks = result.snapshot(step)
+        # bulge track up to and including the plotted snapshot
+        gal_posA = np.append(trail[:, 0], bulges[np.newaxis, 0], 0)
+        gal_posB = np.append(trail[:, 1], bulges[np.newaxis, 1], 0)
+        bulge_step = len(trail)
+        # disk positions of the plotted snapshot
+        step = 0
+        par_posA, particle_Na = disks[0], len(disks[0])
+        if len(disks) > 1:
+            par_posB, particle_Nb = disks[1], len(disks[1])
         
     # if plotting particles for companion disk, number of particles in companion disk must be defined
     if par_posB is not None:
         if particle_Nb is None:
             print('FATALE ERROR: please ensure both disk2 positions [par_posB] and disk2 paritcle count [particle_Nb] are defined \n /ᐠ_ ꞈ _ᐟ\ <(fix it...)')
             raise SystemExit
-        print('ploting....  \n[^._.^]')
-        # make sure step is integer
-        step = int(step)
+        if not quiet:
+            print('ploting....  \n[^._.^]')
         # shift step by number of particles for correct slicing
         stepA = int(particle_Na * step)
         endA = int(stepA + particle_Na)
@@ -68,66 +119,443 @@ def MSG_plot(gal_posA, gal_posB, par_posA, particle_Na, step, par_posB = None, p
         endB = int(stepB + particle_Nb)
 
         # define figure
-        fig = plt.figure(figsize=(10,10), dpi = 100) # create figure
-        ax = plt.axes(projection='3d') # 3d plot
-
-        # formatting
-        plt.rcParams['font.family'] = 'sans-serif' # set font
-        # set border color to white
-        ax.xaxis.set_pane_color((1.0, 1.0, 1.0, 1.0))
-        ax.yaxis.set_pane_color((1.0, 1.0, 1.0, 1.0))
-        ax.zaxis.set_pane_color((1.0, 1.0, 1.0, 1.0))
-        
-        # set view angles
-        ax.view_init(elev = elev, azim = azim)
-        # set lables
-        ax.set_xlabel('\u03A7')
-        ax.set_ylabel('\u03A5')
-        ax.set_zlabel('Z')
+        fig, ax = _plot_axes(elev, azim)
         
         # plot galaxy bulges and disks
-        ax.scatter3D(gal_posA[step,0], gal_posA[step,1], gal_posA[step,2], s = 300, color = 'darkslateblue') # bulge 1
-        ax.scatter3D(gal_posB[step,0], gal_posB[step,1], gal_posB[step,2], s = 300, color = 'black') # bulge 2
+        ax.scatter3D(gal_posA[bulge_step,0], gal_posA[bulge_step,1], gal_posA[bulge_step,2], s = 300, color = 'darkslateblue') # bulge 1
+        ax.scatter3D(gal_posB[bulge_step,0], gal_posB[bulge_step,1], gal_posB[bulge_step,2], s = 300, color = 'black') # bulge 2
         ax.scatter3D(par_posA[stepA:endA,0], par_posA[stepA:endA,1], par_posA[stepA:endA,2], s = 15, color = 'orchid') # particles 
         ax.scatter3D(par_posB[stepB:endB,0], par_posB[stepB:endB,1], par_posB[stepB:endB,2], s = 15, color = 'mediumslateblue') # particles 
         
         if tails is not None:
-            ax.scatter3D(gal_posA[:step,0], gal_posA[:step,1], gal_posA[:step,2], s = 15, color = 'darkslateblue', 
+            ax.scatter3D(gal_posA[:bulge_step,0], gal_posA[:bulge_step,1], gal_posA[:bulge_step,2], s = 15, color = 'darkslateblue', 
                          alpha = .05) # bulge 1
         plt.show()
         
     else:
-        print('ploting....  \n [^._.^]')
-        # make sure step is integer
-        step = int(step)
+        if not quiet:
+            print('ploting....  \n [^._.^]')
         # shift step by number of particles for correct slicing
         stepA = int(particle_Na * step)
         endA = int(stepA + particle_Na)
 
         # define figure
-        fig = plt.figure(figsize=(10,10), dpi = 100) # create figure
-        ax = plt.axes(projection='3d') # 3d plot
-
-        # formatting
-        plt.rcParams['font.family'] = 'sans-serif' # set font
-        # set border color to white
-        ax.xaxis.set_pane_color((1.0, 1.0, 1.0, 1.0))
-        ax.yaxis.set_pane_color((1.0, 1.0, 1.0, 1.0))
-        ax.zaxis.set_pane_color((1.0, 1.0, 1.0, 1.0))
-        
-        # set view angles
-        ax.view_init(elev = elev, azim = azim)
-        # set lables
-        ax.set_xlabel('\u03A7')
-        ax.set_ylabel('\u03A5')
-        ax.set_zlabel('Z')
+        fig, ax = _plot_axes(elev, azim)
         
         # plot galaxy bulges and disks
-        ax.scatter3D(gal_posA[step,0], gal_posA[step,1], gal_posA[step,2], s = 300, color = 'darkslateblue') # bulge 1
-        ax.scatter3D(gal_posB[step,0], gal_posB[step,1], gal_posB[step,2], s = 300, color = 'black') # bulge 2
+        ax.scatter3D(gal_posA[bulge_step,0], gal_posA[bulge_step,1], gal_posA[bulge_step,2], s = 300, color = 'darkslateblue') # bulge 1
+        ax.scatter3D(gal_posB[bulge_step,0], gal_posB[bulge_step,1], gal_posB[bulge_step,2], s = 300, color = 'black') # bulge 2
         ax.scatter3D(par_posA[stepA:endA,0], par_posA[stepA:endA,1], par_posA[stepA:endA,2], s = 15, color = 'orchid') # particles 
         
         if tails is not None:
-            ax.scatter3D(gal_posA[:step,0], gal_posA[:step,1], gal_posA[:step,2], s = 15, color = 'darkslateblue', 
+            ax.scatter3D(gal_posA[:bulge_step,0], gal_posA[:bulge_step,1], gal_posA[:bulge_step,2], s = 15, color = 'darkslateblue', 
                          alpha = .05) # bulge 1
         plt.show()
+
+def _frame_rows(n_rows, n_snapshots, save_every = 1):
+    """this function returns the bulge array row of every particle snapshot of the MSG_galaxy output arrays, 
+    either one row per snapshot [full_bulges = False] or one row per timestep after the first [full_bulges = True],
+    where snapshot s is timestep s * save_every; the full resolution rows do not hold the initial state, so 
+    snapshot 0 uses the first row. any other layout [ei. save_steps with full_bulges] raises an error"""
+    import numpy as np # computational
+    if n_rows == n_snapshots:
+        return np.arange(n_snapshots)
+    if int(save_every) >= 1 and n_rows // int(save_every) == n_snapshots - 1:
+        return np.maximum(np.arange(n_snapshots) * int(save_every) - 1, 0)
+    raise ValueError('ERROR: ' + str(n_rows) + ' bulge positions do not match ' + str(n_snapshots) + ' particle '
+                     'snapshots, use full_bulges = False or the save_every of the simulation \n /ᐠ=ᆽ=ᐟ\\ '
+                     '<(hisss.....)')
+
+def _frame_reader(gal_posA, gal_posB, par_posA, particle_Na, par_posB, particle_Nb, offset = 0, save_every = 1,
+                  rows = None):
+    """this function returns a function frame(step) giving the bulge A and B positions, the bulge A trail and a 
+    list of disk positions of snapshot step, the number of snapshots, and the bulge A and B positions used to fit
+    the axes limits; gal_posA can be the directory of a trajectory store. offset is the first snapshot held by 
+    sliced particle arrays and rows the bulge row of every snapshot [used by MSG_render to send each process only
+    its own snapshots], by default found by _frame_rows from save_every"""
+    import numpy as np # computational
+    
+    # read frames from trajectory store or result
+    from .MSGresult import _as_result
+    result = _as_result(gal_posA)
+    if result is not None:
+        def frame(step):
+            bulges, trail, disks = result.snapshot(step)
+            return bulges[0], bulges[1], trail[:, 0], disks
+        return frame, len(result), np.concatenate((result.bulge(0), result.bulge(1)))
+    
+    # read frames from arrays
+    if par_posB is not None and particle_Nb is None:
+        raise ValueError('ERROR: please ensure both disk2 positions [par_posB] and disk2 particle count '
+                         '[particle_Nb] are defined \n /ᐠ=ᆽ=ᐟ\\ <(hisss.....)')
+    counts = [int(particle_Na)] + ([int(particle_Nb)] if par_posB is not None else [])
+    par_arrs = [par_posA] + ([par_posB] if par_posB is not None else [])
+    n_frames = offset + len(par_posA) // counts[0]
+    if rows is None:
+        rows = _frame_rows(len(gal_posA), n_frames, save_every)
+    def frame(step):
+        # shift step by number of particles for correct slicing
+        disks = [arr[n*(step - offset):n*(step - offset) + n] for arr, n in zip(par_arrs, counts)]
+        row = rows[step]
+        return gal_posA[row], gal_posB[row], gal_posA[:row], disks
+    return frame, n_frames, np.concatenate((gal_posA, gal_posB))
+
+def _frame_limits(track, disks, lim = None):
+    """this function returns the [[xmin, xmax], [ymin, ymax], [zmin, zmax]] axes limits of an animation, either 
+    from lim [L for (-L, L) on every axis] or fitted to the bulge track and the disks of the first frame"""
+    import numpy as np # computational
+    if lim is None:
+        points = np.concatenate([np.asarray(track)] + [np.asarray(disk) for disk in disks])
+        return np.stack((points.min(0), points.max(0)), axis = 1).tolist()
+    if np.ndim(lim) == 0:
+        return [[-lim, lim]] * 3
+    return lim
+
+def _animation(frame, step, lim, tails = None, dpi = 100, elev = 45, azim = 90):
+    """this function draws snapshot step on a new figure with fixed axes limits and returns the figure and a 
+    function update(step) which moves the artists to another snapshot without drawing a new figure"""
+    import numpy as np # computational
+    
+    # define figure and artists once; every frame only moves them
+    fig, ax = _plot_axes(elev, azim, dpi = dpi)
+    bulgeA, bulgeB, tail, disks = frame(step)
+    colors = ['orchid', 'mediumslateblue']
+    plotA = ax.scatter3D(*bulgeA, s = 300, color = 'darkslateblue') # bulge 1
+    plotB = ax.scatter3D(*bulgeB, s = 300, color = 'black') # bulge 2
+    plot_disks = [ax.scatter3D(disk[:,0], disk[:,1], disk[:,2], s = 15, color = colors[d % 2]) # particles
+                  for d, disk in enumerate(disks)]
+    if tails is not None:
+        plot_tail = ax.scatter3D(tail[:,0], tail[:,1], tail[:,2], s = 15, color = 'darkslateblue', alpha = .05) # bulge 1
+    
+    # fixed axes limits, so the camera does not jump between frames
+    ax.set_xlim(*lim[0])
+    ax.set_ylim(*lim[1])
+    ax.set_zlim(*lim[2])
+    
+    def update(step):
+        """move the artists to the positions of snapshot step"""
+        bulgeA, bulgeB, tail, disks = frame(step)
+        plotA._offsets3d = tuple(bulgeA[:, np.newaxis])
+        plotB._offsets3d = tuple(bulgeB[:, np.newaxis])
+        for plot, disk in zip(plot_disks, disks):
+            plot._offsets3d = (disk[:,0], disk[:,1], disk[:,2])
+        if tails is not None:
+            plot_tail._offsets3d = (tail[:,0], tail[:,1], tail[:,2])
+    return fig, update
+
+def _check_writer(filename):
+    """this function raises an error if the animation file format of filename can not be written"""
+    import os # file names
+    import matplotlib.animation as animation
+    ext = os.path.splitext(filename)[1]
+    if ext not in ('.png', '.gif') and not animation.FFMpegWriter.isAvailable():
+        raise ValueError('ERROR: ffmpeg is needed to write ' + ext + ' files, please install it or use '
+                         'a .gif or .png filename \n /ᐠ=ᆽ=ᐟ\\ <(hisss.....)')
+
+def _write_frames(fig, update, steps, filename, fps = 30, dpi = 100):
+    """this function writes an animation of fig to filename [see MSG_animate], calling update(step) before every 
+    frame; steps can be any iterable, ei. a generator of snapshots that are still being simulated"""
+    import os # file names
+    import matplotlib.animation as animation
+    root, ext = os.path.splitext(filename)
+    os.makedirs(os.path.dirname(root) or '.', exist_ok = True)
+    if ext == '.png':
+        # numbered png images
+        for i, step in enumerate(steps):
+            update(step)
+            fig.savefig(root + '_' + str(i).zfill(5) + ext)
+    else:
+        # stream frames to the writer one at a time
+        if ext == '.gif':
+            writer = animation.PillowWriter(fps = fps)
+        else:
+            writer = animation.FFMpegWriter(fps = fps)
+        with writer.saving(fig, filename, dpi):
+            for step in steps:
+                update(step)
+                writer.grab_frame()
+
+def MSG_animate(gal_posA, gal_posB = None, par_posA = None, particle_Na = None, par_posB = None, particle_Nb = None,
+                filename = 'merger.mp4', start = 0, stop = None, stride = 1, fps = 30, tails = None, lim = None, 
+                dpi = 100, quiet = False, save_every = 1, **kwargs):
+    """this function animates the simulation, drawing the figure once and only moving the particles every frame
+    the frames are written straight to a video file [or png images], so long animations use little memory
+    ---------------------------------------------------------------------------
+    gal_posA, gal_posB, par_posA, particle_Na, par_posB, particle_Nb: see MSG_plot; par_posB is optional
+    
+    [TRAJECTORY STORE]: like MSG_plot, gal_posA can be the directory of a trajectory store written by 
+    MSG_galaxy(..., store = path) or a MSG_result; every frame is read from disk as it is drawn
+    example: MSG_animate('merger_run', filename = 'merger.mp4', stride = 2)
+    
+    filename [string]: by default 'merger.mp4'; output file, the format is set by the extension
+    '.mp4' [or any other video extension]: streamed to ffmpeg, which must be installed
+    '.gif': written with pillow, which keeps the frames in memory until the end
+    '.png': every frame is saved as a numbered image, ei. 'frames/merger.png' saves frames/merger_00000.png, ...
+    
+    start, stop [integer]: by default 0 and the last snapshot; range of snapshots to animate
+    
+    stride [integer]: by default 1; animate every stride-th snapshot
+    
+    fps [integer]: by default 30; frames per second of the animation
+    
+    tails [boolean]: if True, will plot companion bulge trail showing motion through space
+    
+    lim [float or list]: by default None; axes limits, either L for (-L, L) on every axis or 
+    [[xmin, xmax], [ymin, ymax], [zmin, zmax]]. by default the limits fit the bulge tracks and the first frame
+    
+    dpi [integer]: by default 100; resolution of the 10 x 10 inch frames
+    
+    quiet [boolean]: by default False; if True, nothing is printed
+    
+    save_every [integer]: by default 1; save_every of the simulation, so each particle snapshot is drawn with the
+    bulge positions of the same timestep. the bulge arrays must hold either one row per snapshot 
+    [MSG_galaxy(..., full_bulges = False)] or every timestep [the default full_bulges = True] of a run with this 
+    save_every; other layouts [ei. save_steps with full bulges] raise an error, use full_bulges = False or a 
+    MSG_result instead. the full resolution bulge arrays start after the first timestep, so the first frame shows 
+    the bulges one timestep later
+    
+    [**kwargs]:
+    elev, azim [float / integer]: camera viewing angles, see MSG_plot
+    -------------------------------------------------------------------------------------------------------------
+    OUTPUT [string]: filename of the animation
+    example: MSG_animate(a, b, c, N, d, M, filename = 'merger.mp4', start = 0, stop = 1000, stride = 5)
+    =^._.^= 
+    """
+    
+    # import plotting packages
+    import matplotlib.pyplot as plt
+
+    # default camera viewing angles
+    elev = kwargs.get('elev', 45) # z viewing angle (0 = edge on; 90 = Bird's eye view)
+    azim = kwargs.get('azim', 90) # xy plane rotation angle
+    
+    frame, n_frames, track = _frame_reader(gal_posA, gal_posB, par_posA, particle_Na, par_posB, particle_Nb,
+                                           save_every = save_every)
+    # snapshots to animate
+    stop = n_frames if stop is None else min(int(stop), n_frames)
+    steps = range(int(start), stop, int(stride))
+    if len(steps) == 0:
+        raise ValueError('ERROR: no snapshots to animate, check start, stop and stride \n /ᐠ=ᆽ=ᐟ\\ <(hisss.....)')
+    
+    _check_writer(filename)
+    
+    if not quiet:
+        print('animating....  \n [^._.^]')
+    lim = _frame_limits(track, frame(steps[0])[3], lim)
+    fig, update = _animation(frame, steps[0], lim, tails, dpi, elev, azim)
+    _write_frames(fig, update, steps, filename, fps, dpi)
+    plt.close(fig)
+    if not quiet:
+        print('animation complete [yay!!! (ﾐΦ ﻌ Φﾐ)✿ *ᵖᵘʳʳ*]')
+    return filename
+
+def _render_frames(job):
+    """this function renders the snapshots job['steps'] of one MSG_render process to the png files job['names'], 
+    reusing a single figure; job['data'] holds the MSG_plot style arrays [or store directory] of its snapshots"""
+    import matplotlib
+    matplotlib.use('Agg') # headless rendering
+    import matplotlib.pyplot as plt
+    
+    frame = _frame_reader(*job['data'], offset = job['offset'], rows = job['rows'])[0]
+    fig, update = _animation(frame, job['steps'][0], job['lim'], job['tails'], job['dpi'], job['elev'], job['azim'])
+    for step, name in zip(job['steps'], job['names']):
+        update(step)
+        fig.savefig(name)
+    plt.close(fig)
+    return len(job['names'])
+
+def MSG_render(gal_posA, gal_posB = None, par_posA = None, particle_Na = None, par_posB = None, particle_Nb = None,
+               directory = 'frames', filename = None, start = 0, stop = None, stride = 1, fps = 30, processes = None, 
+               tails = None, lim = None, dpi = 100, quiet = False, save_every = 1, **kwargs):
+    """this function renders the frames of an animation in parallel, splitting the snapshots between a pool of 
+    processes that each draw their frames to numbered png images, and then optionally assembles them into a video
+    ---------------------------------------------------------------------------
+    gal_posA, gal_posB, par_posA, particle_Na, par_posB, particle_Nb: see MSG_plot; par_posB is optional
+    gal_posA can also be the directory of a trajectory store, which every process reads from disk
+    
+    directory [string]: by default 'frames'; directory of the png images frame_00000.png, frame_00001.png, ...
+    
+    filename [string]: by default None; if given [ei. 'merger.mp4'], the frames are assembled into a video with 
+    ffmpeg, which must be installed
+    
+    start, stop, stride, fps, tails, lim, dpi, quiet, elev, azim: see MSG_animate
+    
+    save_every [integer]: by default 1; save_every of the simulation, so each particle snapshot is drawn with the
+    bulge positions of the same timestep; the bulge arrays must hold one row per snapshot [full_bulges = False]
+    or every timestep of a run with this save_every, see MSG_animate
+    
+    processes [integer]: by default None; number of processes rendering frames [default: cpu count]
+    -------------------------------------------------------------------------------------------------------------
+    OUTPUT [string]: filename of the video, or directory of the frames if filename is None
+    example: MSG_render(a, b, c, N, d, M, filename = 'merger.mp4', stride = 2, processes = 8)
+    =^._.^= 
+    """
+    import os # file names, cpu count
+    import shutil # find ffmpeg
+    import subprocess # run ffmpeg
+    import numpy as np # computational
+    from concurrent.futures import ProcessPoolExecutor # process pool
+    from .MSGresult import MSG_result
+    
+    # default camera viewing angles
+    elev = kwargs.get('elev', 45) # z viewing angle (0 = edge on; 90 = Bird's eye view)
+    azim = kwargs.get('azim', 90) # xy plane rotation angle
+    
+    if filename is not None and shutil.which('ffmpeg') is None:
+        raise ValueError('ERROR: ffmpeg is needed to assemble ' + filename + ', please install it or only render '
+                         'the frames [filename = None] \n /ᐠ=ᆽ=ᐟ\\ <(hisss.....)')
+    data = (gal_posA, gal_posB, par_posA, particle_Na, par_posB, particle_Nb)
+    frame, n_frames, track = _frame_reader(*data, save_every = save_every)
+    # snapshots to render
+    stop = n_frames if stop is None else min(int(stop), n_frames)
+    steps = list(range(int(start), stop, int(stride)))
+    if len(steps) == 0:
+        raise ValueError('ERROR: no snapshots to render, check start, stop and stride \n /ᐠ=ᆽ=ᐟ\\ <(hisss.....)')
+    # every process uses the same axes limits, so the frames line up
+    lim = _frame_limits(track, frame(steps[0])[3], lim)
+    os.makedirs(directory, exist_ok = True)
+    names = [os.path.join(directory, 'frame_' + str(i).zfill(5) + '.png') for i in range(len(steps))]
+    
+    # split the snapshots into one contiguous chunk per process
+    processes = processes if processes is not None else os.cpu_count()
+    processes = max(1, min(int(processes), len(steps)))
+    jobs = []
+    for chunk in np.array_split(np.arange(len(steps)), processes):
+        first, last = steps[chunk[0]], steps[chunk[-1]]
+        if isinstance(gal_posA, str):
+            job_data, offset, rows = data, 0, None
+        elif isinstance(gal_posA, MSG_result):
+            # results of a trajectory store are reopened by each process, in memory results are sent whole
+            job_data, offset, rows = (gal_posA.path if gal_posA.path is not None else gal_posA,) + data[1:], 0, None
+        else:
+            # only send the particle snapshots of this chunk and the bulge rows up to its last snapshot
+            rows = _frame_rows(len(gal_posA), n_frames, save_every)[:last + 1]
+            job_data = (gal_posA[:rows[-1] + 1], gal_posB[:rows[-1] + 1], 
+                        par_posA[particle_Na*first:particle_Na*(last + 1)], particle_Na,
+                        None if par_posB is None else par_posB[particle_Nb*first:particle_Nb*(last + 1)], particle_Nb)
+            offset = first
+        jobs.append({'data': job_data, 'offset': offset, 'rows': rows, 'steps': [steps[i] for i in chunk], 
+                     'names': [names[i] for i in chunk], 'lim': lim, 'tails': tails, 'dpi': dpi, 
+                     'elev': elev, 'azim': azim})
+    
+    if not quiet:
+        print('rendering....  \n [^._.^]')
+    if processes == 1:
+        for job in jobs:
+            _render_frames(job)
+    else:
+        with ProcessPoolExecutor(max_workers = processes) as pool:
+            for done in pool.map(_render_frames, jobs):
+                pass
+    
+    if filename is None:
+        if not quiet:
+            print('rendering complete [yay!!! (ﾐΦ ﻌ Φﾐ)✿ *ᵖᵘʳʳ*]')
+        return directory
+    # assemble the video from the numbered frames
+    subprocess.run(['ffmpeg', '-y', '-loglevel', 'error', '-framerate', str(fps), 
+                    '-i', os.path.join(directory, 'frame_%05d.png'), '-pix_fmt', 'yuv420p', filename], check = True)
+    if not quiet:
+        print('rendering complete [yay!!! (ﾐΦ ﻌ Φﾐ)✿ *ᵖᵘʳʳ*]')
+    return filename
+
+def _project(points, elev, azim):
+    """this function projects (N, 3) positions onto the image plane of a camera at elev and azim degrees [same 
+    viewing angles as the 3d plots], returning the horizontal and vertical image coordinates"""
+    import numpy as np # computational
+    e, a = np.radians(elev), np.radians(azim)
+    u = -points[:, 0] * np.sin(a) + points[:, 1] * np.cos(a)
+    v = -(points[:, 0] * np.cos(a) + points[:, 1] * np.sin(a)) * np.sin(e) + points[:, 2] * np.cos(e)
+    return u, v
+
+def MSG_density(gal_posA, gal_posB = None, par_posA = None, particle_Na = None, step = None, par_posB = None, 
+                particle_Nb = None, bins = 512, extent = None, vmax = None, colors = ('orchid', 'mediumslateblue'),
+                filename = None, save_every = 1, **kwargs):
+    """this function renders a snapshot as an image of the projected surface density of every disk instead of
+    plotting each particle, so that snapshots of millions of particles are rendered in a fraction of a second
+    the particles are projected onto the image plane of the camera, counted in bins x bins pixels, and every 
+    disk is given its own color with a brightness set by the log of its surface density on a black background
+    ---------------------------------------------------------------------------
+    gal_posA, gal_posB, par_posA, particle_Na, step, par_posB, particle_Nb: see MSG_plot; par_posB is optional
+    gal_posA can also be the directory of a trajectory store, like MSG_plot
+    
+    bins [integer]: by default 512; width and height of the image in pixels
+    
+    extent [float or list]: by default None; image plane area shown, either L for (-L, L) on both axes or 
+    [umin, umax, vmin, vmax]. by default it fits every particle of the snapshot; give a fixed extent [and vmax] 
+    to render the frames of an animation
+    
+    vmax [float]: by default None [densest pixel]; particle count per pixel shown at full brightness
+    
+    colors [list]: by default ('orchid', 'mediumslateblue'); matplotlib color of each disk
+    
+    filename [string]: by default None; if given, the image is also saved to this file [ei. 'frame.png']
+    
+    save_every [integer]: by default 1; save_every of the simulation, so the bulges are marked at the timestep of 
+    particle snapshot step; the bulge arrays must hold one row per snapshot [full_bulges = False] or every 
+    timestep of a run with this save_every, see MSG_animate
+    
+    [**kwargs]:
+    elev, azim [float / integer]: camera viewing angles, see MSG_plot
+    -------------------------------------------------------------------------------------------------------------
+    OUTPUT [numpy array]: (bins, bins, 3) rgb image, rows from the bottom to the top of the image plane
+    example: image = MSG_density(a, b, c, N, 999, d, M, bins = 1024, filename = 'frame.png')
+    plt.imshow(image, origin = 'lower')
+    =^._.^= 
+    """
+    import numpy as np # computational
+    import matplotlib.colors as mcolors
+    
+    # default camera viewing angles
+    elev = kwargs.get('elev', 45) # z viewing angle (0 = edge on; 90 = Bird's eye view)
+    azim = kwargs.get('azim', 90) # xy plane rotation angle
+    
+    # positions of bulges and disks at step
+    from .MSGresult import _as_result
+    result = _as_result(gal_posA)
+    if result is not None:
+        bulges, trail, disks = result.snapshot(int(step))
+    else:
+        frame = _frame_reader(gal_posA, gal_posB, par_posA, particle_Na, par_posB, particle_Nb,
+                              save_every = save_every)[0]
+        bulgeA, bulgeB, tail, disks = frame(int(step))
+        bulges = np.stack((bulgeA, bulgeB))
+    
+    # project every disk onto the image plane
+    projected = [_project(np.asarray(disk), elev, azim) for disk in disks]
+    if extent is None:
+        u = np.concatenate([p[0] for p in projected])
+        v = np.concatenate([p[1] for p in projected])
+        extent = [u.min(), u.max(), v.min(), v.max()]
+    elif np.ndim(extent) == 0:
+        extent = [-extent, extent, -extent, extent]
+    umin, umax, vmin, vmax_ = extent
+    
+    # count particles of each disk per pixel
+    counts = np.zeros((len(disks), bins * bins))
+    for d, (u, v) in enumerate(projected):
+        i = np.floor((v - vmin) / (vmax_ - vmin) * bins).astype(int) # image row
+        j = np.floor((u - umin) / (umax - umin) * bins).astype(int) # image column
+        inside = (i >= 0) & (i < bins) & (j >= 0) & (j < bins)
+        counts[d] = np.bincount(i[inside] * bins + j[inside], minlength = bins * bins)
+    
+    # log surface density brightness, one color for each disk on a black background
+    if vmax is None:
+        vmax = max(counts.max(), 1.)
+    brightness = np.clip(np.log1p(counts) / np.log1p(vmax), 0, 1)
+    rgb = np.array([mcolors.to_rgb(colors[d % len(colors)]) for d in range(len(disks))])
+    image = np.clip(brightness.T @ rgb, 0, 1).reshape(bins, bins, 3)
+    
+    # mark bulges with white dots
+    r = max(1, bins // 256)
+    bu, bv = _project(np.asarray(bulges, dtype = float), elev, azim)
+    for u, v in zip(bu, bv):
+        i = int((v - vmin) / (vmax_ - vmin) * bins)
+        j = int((u - umin) / (umax - umin) * bins)
+        if 0 <= i < bins and 0 <= j < bins:
+            image[max(i - r, 0):i + r + 1, max(j - r, 0):j + r + 1] = 1.
+    
+    if filename is not None:
+        import matplotlib.pyplot as plt
+        plt.imsave(filename, image, origin = 'lower')
+    return image
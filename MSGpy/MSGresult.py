@@ -0,0 +1,101 @@
+def _as_result(source):
+    """this function returns the MSG_result of a trajectory store directory or MSG_result given to a plotting
+    or analysis function instead of position arrays, or None if source is a position array"""
+    if isinstance(source, str):
+        from .MSGstore import MSG_load
+        return MSG_load(source, result = True)
+    if isinstance(source, MSG_result):
+        return source
+    return None
+
+class MSG_result:
+    """
+    this class holds the trajectories of a MSG_galaxy simulation and gives views of them by disk label, snapshot,
+    bulge and particle, without copying; it is returned by MSG_galaxy(..., result = True) and
+    MSG_load(path, result = True), and can be given to MSG_plot, MSG_animate, MSG_render and MSG_density instead
+    of the position arrays
+    ----------------------------------------------------------------------
+    result.labels [list]: disk labels ['primary', 'companion', ...]
+
+    result.snap_steps [numpy array]: timestep of every stored snapshot [0 = initial state]
+
+    result.disk(label)[i]: (N, 3) positions of disk label [or index] at snapshot i; result.disk(label) is the
+    (S, N, 3) array indexed by [snapshot, particle]
+
+    result.bulge(k)[a:b]: positions of bulge k; indexed by timestep [0 = initial state] if the bulges were stored
+    every timestep [full_bulges = True], otherwise by snapshot
+
+    result.track(label, i): (S, 3) positions of particle i of disk label at every snapshot
+
+    result.snapshot(i): (K, 3) bulge positions at snapshot i, the (rows, K, 3) bulge track before it and the
+    list of (N, 3) positions of every disk at snapshot i
+
+    result.arrays(flat = True): the arrays returned by MSG_galaxy without result, ei. a, b, c, d = result.arrays()
+
+    result.dt, result.mass, result.soft_param: simulation parameters, used by the analysis functions [see MSG_energy]
+    ----------------------------------------------------------------------------------
+    example: result = MSG_galaxy(*args, disk2 = com_p, diskvel = com_v, result = True)
+    result.disk('companion')[100], result.bulge(0)[:500], result.track('primary', 42)
+    =^._.^=
+    """
+
+    def __init__(self, bulges, disks, labels, snap_steps, full_bulges = True, path = None, dt = None, mass = None,
+                 soft_param = None):
+        """bulges is the (rows, K, 3) bulge buffer starting at the initial state, disks the list of (S, N, 3)
+        disk buffers; path is the directory of the trajectory store holding them, if any"""
+        import numpy as np # computational
+        self._bulges = bulges
+        self._disks = list(disks)
+        self.labels = list(labels)
+        self.snap_steps = np.asarray(snap_steps)
+        self.full_bulges = bool(full_bulges)
+        self.path = path
+        self.dt = dt
+        self.mass = None if mass is None else np.asarray(mass, dtype = float)
+        self.soft_param = soft_param
+
+    def __repr__(self):
+        counts = ', '.join(label + ': ' + str(disk.shape[1]) for label, disk in zip(self.labels, self._disks))
+        return ('MSG_result(' + str(self._bulges.shape[1]) + ' bulges, ' + str(len(self.snap_steps)) +
+                ' snapshots, particles {' + counts + '})')
+
+    def __len__(self):
+        return len(self.snap_steps)
+
+    def _index(self, label):
+        """index of the disk with a given label [or index]"""
+        if isinstance(label, str):
+            if label not in self.labels:
+                raise ValueError('ERROR: no disk labelled ' + label + ', the disks are ' + str(self.labels) +
+                                 ' \n /ᐠ=ᆽ=ᐟ\\ <(hisss.....)')
+            return self.labels.index(label)
+        return int(label)
+
+    def disk(self, label = 0):
+        """(S, N, 3) positions of a disk, indexed by [snapshot, particle]"""
+        return self._disks[self._index(label)]
+
+    def bulge(self, k = 0):
+        """(rows, 3) positions of bulge k, indexed by timestep if full_bulges else by snapshot"""
+        return self._bulges[:, k]
+
+    def track(self, label, particle):
+        """(S, 3) positions of a particle [or (S, n, 3) for a list of particles] at every snapshot"""
+        return self.disk(label)[:, particle]
+
+    @property
+    def particle_counts(self):
+        """number of particles of every disk"""
+        return [disk.shape[1] for disk in self._disks]
+
+    def snapshot(self, step):
+        """(K, 3) bulge positions at snapshot step, the bulge track before it and the list of disk positions"""
+        # full resolution bulge tracks are indexed by timestep instead of snapshot
+        row = int(self.snap_steps[step]) if self.full_bulges else int(step)
+        return self._bulges[row], self._bulges[:row], [disk[step] for disk in self._disks]
+
+    def arrays(self, flat = True):
+        """tuple of arrays in the MSG_galaxy output format: one array for each bulge, then one for each disk"""
+        bulges = self._bulges[1:] if self.full_bulges else self._bulges
+        disks = [disk.reshape(-1, 3) for disk in self._disks] if flat else self._disks
+        return tuple([bulges[:, k] for k in range(bulges.shape[1])] + disks)
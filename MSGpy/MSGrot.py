@@ -1,87 +1,167 @@
-def MSG_rotate(gal_pos, gal_vel, par_pos, par_vel, theta, Xrot = None, Yrot = None, Zrot = None, 
-               pos_shift = [0.,0.,0.], vel_shift = [0.,0.,0.]):
+def _axis_matrix(axis, radian):
+    """this function returns the rotation matrix about the 'x', 'y' or 'z' axis for an angle in radians
+    radian may be an array of B angles, giving a (B, 3, 3) stack of matrices"""
+    import numpy as np # computational
+    radian = np.asarray(radian, dtype = float)
+    c, s = np.cos(radian), np.sin(radian)
+    R = np.zeros(radian.shape + (3, 3))
+    # rows and columns of the rotation plane, with the sign of the sine terms
+    i, k = {'x': (1, 2), 'y': (2, 0), 'z': (0, 1)}[axis]
+    R[..., 'xyz'.index(axis), 'xyz'.index(axis)] = 1.
+    R[..., i, i], R[..., i, k] = c, -s
+    R[..., k, i], R[..., k, k] = s, c
+    return R
+
+def _axis_angle_matrix(axis, radian):
+    """this function returns the rotation matrix about an arbitrary axis [x, y, z] for an angle in radians
+    [Rodrigues formula]; axis may be a (B, 3) array and radian an array of B angles"""
+    import numpy as np # computational
+    k = np.asarray(axis, dtype = float)
+    k = k / np.linalg.norm(k, axis = -1, keepdims = True) # unit vector
+    radian = np.asarray(radian, dtype = float)[..., np.newaxis, np.newaxis]
+    # cross product matrix of the axis
+    K = np.zeros(k.shape[:-1] + (3, 3))
+    K[..., 0, 1], K[..., 0, 2], K[..., 1, 2] = -k[..., 2], k[..., 1], -k[..., 0]
+    K = K - np.swapaxes(K, -1, -2)
+    return np.eye(3) + np.sin(radian) * K + (1 - np.cos(radian)) * (K @ K)
+
+def MSG_rotation_matrix(theta = None, Xrot = None, Yrot = None, Zrot = None, axis = None, euler = None,
+                        sequence = 'zxz', inclination = None, position_angle = 0.):
+    """
+    this function composes a single rotation matrix R for MSG_rotate, which rotates row vectors v as v @ R
+    exactly one orientation must be given; every angle is in degrees and can also be an array of B angles
+    to make a (B, 3, 3) stack of matrices [one for each disk of a stack of disks]
+    ----------------------------------------------------------------------
+    theta [float]: angle of rotation about the axis given by Xrot, Yrot, Zrot or axis
+
+    Xrot, Yrot, Zrot [boolean]: by default set to None; set one to True to rotate about respective axis
+
+    axis [list]: by default None; arbitrary axis of rotation [x, y, z], rotated by theta
+    ex: axis = [1., 1., 0.]
+
+    euler [list]: by default None; 3 angles [a, b, c] of successive rotations about the axes in sequence
+    ex: euler = [30., 45., 0.], sequence = 'zxz' is the same as Zrot by 30, then Xrot by 45, then Zrot by 0
+
+    sequence [string]: by default 'zxz'; axes of the euler rotations, any 3 letters of x, y, z
+
+    inclination [float]: by default None; inclination of a disk in the xy plane, the same as Xrot by inclination
+    followed by Zrot by position_angle
+
+    position_angle [float]: by default 0; position angle of an inclined disk
+    -------------------------------------------------------------------------------------------------------------
+    OUTPUT [numpy array]: (3, 3) rotation matrix, or (B, 3, 3) for arrays of angles
+    example: R = MSG_rotation_matrix(euler = [30., 45., 0.])
+    =^._.^=
+    """
+    import numpy as np # computational
+
+    # ensure exactly one orientation is given
+    axes = [a for a, rot in zip('xyz', (Xrot, Yrot, Zrot)) if rot]
+    given = len(axes) + (axis is not None) + (euler is not None) + (inclination is not None)
+    if given != 1:
+        raise ValueError('ERROR: please specify exactly one orientation [Xrot, Yrot, Zrot, axis, euler or '
+                         'inclination] \n /ᐠ=ᆽ=ᐟ\\ <(hisss.....)')
+    if (axes or axis is not None) and theta is None:
+        raise ValueError('ERROR: please specify the angle of rotation theta \n /ᐠ=ᆽ=ᐟ\\ <(hisss.....)')
+
+    # AXIS ROTATION
+    if axes:
+        return _axis_matrix(axes[0], np.radians(theta))
+    if axis is not None:
+        return _axis_angle_matrix(axis, np.radians(theta))
+    # EULER ANGLES
+    if euler is not None:
+        if len(sequence) != 3 or any(a not in 'xyz' for a in sequence):
+            raise ValueError("ERROR: sequence must be 3 letters of x, y, z [ei. 'zxz'] \n /ᐠ=ᆽ=ᐟ\\ <(hisss.....)")
+        R = _axis_matrix(sequence[0], np.radians(euler[0]))
+        for a, angle in zip(sequence[1:], euler[1:]):
+            R = R @ _axis_matrix(a, np.radians(angle))
+        return R
+    # INCLINATION AND POSITION ANGLE
+    return _axis_matrix('x', np.radians(inclination)) @ _axis_matrix('z', np.radians(position_angle))
+
+def MSG_rotate(gal_pos, gal_vel, par_pos, par_vel, theta = None, Xrot = None, Yrot = None, Zrot = None,
+               pos_shift = [0.,0.,0.], vel_shift = [0.,0.,0.], axis = None, euler = None, sequence = 'zxz',
+               inclination = None, position_angle = 0., matrix = None, inplace = False):
     """
     this function rotates the x, y, z positions and velocities of a disk to add disk inclination
     --------------------------------------------------------------------------------------------
-    gal_pos [numpy array]: x, y, z bulge positions to be rotated
-    
-    gal_vel [numpy array]: x, y, z bulge velocities to be rotated
-    
+    gal_pos [numpy array]: x, y, z bulge positions to be rotated [or None]
+
+    gal_vel [numpy array]: x, y, z bulge velocities to be rotated [or None]
+
     par_pos [numpy array]: x, y, z disk positions to be rotated
-    
+
     par_vel [numpy array]: x, y, z disk velocities to be rotated
-    
-    velocities [numpy array]: x, y, z velocities to be rotated
-    
+
     theta [float]: angle of rotation in degrees
-    
+
     Xrot, Yrot, Zrot [boolean]: by default set to None; set one to True to perform rotation about respective axis
-    
+
     pos_shift [numpy array]: center of galaxy disk
     ex: pos_shift = [0.,1.,1.]
-    
+
     vel_shift [numpy array]: initial velocity for galaxy bulge
     ex: vel_shift = [0.,0.,0.]
     -------------------------------------------------------------------------------------------------------------
+    [OPTIONAL]: instead of one axis, any orientation can be given and is composed into a single rotation matrix
+    [see MSG_rotation_matrix]; exactly one of Xrot, Yrot, Zrot, axis, euler, inclination or matrix must be given
+
+    axis [list]: arbitrary axis of rotation [x, y, z], rotated by theta
+
+    euler [list]: 3 angles [a, b, c] in degrees of successive rotations about the axes in sequence [default 'zxz']
+
+    inclination, position_angle [float]: inclination and position angle in degrees of a disk in the xy plane
+
+    matrix [numpy array]: a (3, 3) rotation matrix [or (B, 3, 3) stack] from MSG_rotation_matrix
+
+    inplace [boolean]: by default False; if True, the input arrays are rotated in place instead of making new
+    arrays, which saves memory for large disks
+    -------------------------------------------------------------------------------------------------------------
+    [BATCH]: a stack of B disks can be rotated at once by giving (B, N, 3) disk arrays, (B, 3) or (B, K, 3)
+    bulge arrays and (B, 3) shifts; with arrays of B angles every disk gets its own orientation
+    -------------------------------------------------------------------------------------------------------------
     OUTPUT [numpy array]: rotated x, y, z positions and velocities
     example: perform 90º rotation about X axis for disk centered at origin
     bulge_pos, bulge_vel, disk_pos, disk_vel = MSG_rotate(pos, vel, disk_pos, disk_vel, 90, Xrot = True)
+    example: incline a companion disk by 60º with a position angle of 30º, in place
+    MSG_rotate(pos[0], vel[0], com_p, com_v, inclination = 60, position_angle = 30, pos_shift = pos[0], 
+               vel_shift = vel[0], inplace = True)
     """
     import numpy as np # computational
-    radian = theta * (np.pi / 180)
-    
-    # X AXIS ROTATION
-    if Xrot is not None: 
-        if Yrot or Zrot is not None: # ensure only one axis of rotation is given
-            print('ERROR: please only specify one axis of rotation; set only one axis of rotation to True \n /ᐠ=ᆽ=ᐟ\ <(hisss.....)')
-            raise SystemExit # exit program if error is raised
-        # x axis rotation matrix
-        R_x = np.array([[1., 0., 0.], [0., np.cos(radian), -np.sin(radian)], [0., np.sin(radian), np.cos(radian)]])
-        # shift position and velocities to disk centered around 0,0,0 at rest
-        GP_diff = gal_pos - pos_shift
-        GV_diff = gal_vel - vel_shift
-        PP_diff = par_pos - pos_shift   
-        PV_diff = par_vel - vel_shift
-        # matrix dot product to rotate pos, vel
-        A, B, C, D = GP_diff @ R_x, GV_diff @ R_x, PP_diff @ R_x, PV_diff @ R_x
-        # translate disk positions and velocities back to original state
-        return A + pos_shift, B + vel_shift, C + pos_shift, D + vel_shift
-
-    # Y AXIS ROTATION
-    if Yrot is not None:
-        if Xrot or Zrot is not None: # ensure only one axis of rotation is given
-            print('ERROR: please only specify one axis of rotation; set only one axis of rotation to True \n /ᐠ=ᆽ=ᐟ\ <(hisss.....)')
-            raise SystemExit # exit program if error is raised
-        # y axis rotation matrix
-        R_y = np.array([[np.cos(radian), 0., np.sin(radian)], [0., 1., 0.], [-np.sin(radian), 0., np.cos(radian)]])
-        # shift position and velocities to disk centered around 0,0,0 at rest
-        GP_diff = gal_pos - pos_shift
-        GV_diff = gal_vel - vel_shift
-        PP_diff = par_pos - pos_shift   
-        PV_diff = par_vel - vel_shift
-        # matrix dot product to rotate pos, vel
-        A, B, C, D = GP_diff @ R_y, GV_diff @ R_y, PP_diff @ R_y, PV_diff @ R_y
-        # translate disk positions and velocities back to original state
-        return A + pos_shift, B + vel_shift, C + pos_shift, D + vel_shift
-   
-    # Z AXIS ROTATION
-    if Zrot is not None:
-        if Xrot or Yrot is not None: # ensure only one axis of rotation is given
-            print('ERROR: please only specify one axis of rotation; set only one axis of rotation to True \n /ᐠ=ᆽ=ᐟ\ <(hisss.....)')
-            raise SystemExit # exit program if error is raised
-        # z axis rotation matrix
-        R_z = np.array([[np.cos(radian), -np.sin(radian), 0.], [np.sin(radian), np.cos(radian), 0.], [0., 0., 1.]])
+
+    if matrix is None:
+        R = MSG_rotation_matrix(theta, Xrot, Yrot, Zrot, axis, euler, sequence, inclination, position_angle)
+    else:
+        R = np.asarray(matrix, dtype = float)
+
+    def rotate(arr, shift):
+        """rotate arr about shift as (arr - shift) @ R + shift, broadcasting leading batch axes"""
+        if arr is None:
+            return None
+        if inplace and not isinstance(arr, np.ndarray):
+            raise ValueError('ERROR: inplace rotation needs numpy arrays \n /ᐠ=ᆽ=ᐟ\\ <(hisss.....)')
+        shift = np.array(shift, dtype = float) # copy, in case shift is a view of arr
+        if shift.ndim > 1 and np.ndim(arr) > shift.ndim:
+            # one shift for each disk of a stack, broadcast over particles
+            shift = shift.reshape(shift.shape[:-1] + (1,) * (np.ndim(arr) - shift.ndim) + (3,))
         # shift position and velocities to disk centered around 0,0,0 at rest
-        GP_diff = gal_pos - pos_shift
-        GV_diff = gal_vel - vel_shift
-        PP_diff = par_pos - pos_shift   
-        PV_diff = par_vel - vel_shift
-        # matrix dot product to rotate pos, vel
-        A, B, C, D = GP_diff @ R_z, GV_diff @ R_z, PP_diff @ R_z, PV_diff @ R_z
+        if inplace:
+            arr -= shift
+            out = arr
+        else:
+            out = arr - shift
+        # matrix product to rotate pos, vel; single vectors of a stack are rotated by their own matrix
+        if R.ndim > 2 and out.ndim == R.ndim - 1:
+            rotated = (out[..., np.newaxis, :] @ R)[..., 0, :]
+        else:
+            rotated = out @ R
+        if inplace:
+            out[...] = rotated
+        else:
+            out = rotated
         # translate disk positions and velocities back to original state
-        return A + pos_shift, B + vel_shift, C + pos_shift, D + vel_shift
+        out += shift
+        return out
 
-    # ensure axis of rotation is specified
-    else:
-        print('ERROR: please specify which axis of rotation is required \n /ᐠ=ᆽ=ᐟ\ <(hisss.....)')
-        raise SystemExit
+    return rotate(gal_pos, pos_shift), rotate(gal_vel, vel_shift), rotate(par_pos, pos_shift), rotate(par_vel, vel_shift)
@@ -0,0 +1,106 @@
+def _store_create(path, meta, shapes, resume = False, dtypes = None):
+    """this function creates (or reopens when resuming) an on-disk trajectory store in the directory 'path'
+    the store holds a meta.json header and one memory-mapped .npy file per trajectory array in shapes,
+    ei. {'bulges': (T, 2, 3), 'disk0': (S, N, 3)}, with the dtype given for it in dtypes [by default float]
+    returns a dictionary of writable memory-mapped arrays"""
+    import os # file handling
+    import json # metadata header
+    import numpy as np # computational
+
+    meta_file = os.path.join(path, 'meta.json')
+    if resume:
+        # ensure the store was created by the same simulation setup
+        with open(meta_file) as f:
+            old_meta = json.load(f)
+        for key in set(meta) | set(old_meta):
+            if old_meta.get(key) != meta.get(key):
+                raise ValueError('ERROR: cannot resume store ' + str(path) + ', ' + key + ' does not match '
+                                 'the simulation arguments \n /ᐠ=ᆽ=ᐟ\\ <(hisss.....)')
+        return {name: np.lib.format.open_memmap(os.path.join(path, name + '.npy'), mode = 'r+')
+                for name in shapes}
+
+    os.makedirs(path, exist_ok = True)
+    with open(meta_file, 'w') as f:
+        json.dump(meta, f, indent = 1)
+    # remove stale checkpoint from a previous run in the same directory
+    if os.path.exists(os.path.join(path, 'checkpoint.npz')):
+        os.remove(os.path.join(path, 'checkpoint.npz'))
+    dtypes = dtypes if dtypes is not None else {}
+    return {name: np.lib.format.open_memmap(os.path.join(path, name + '.npy'), mode = 'w+', 
+                                            dtype = dtypes.get(name, float), shape = shape) 
+            for name, shape in shapes.items()}
+
+def _store_checkpoint(path, arrays, state):
+    """this function flushes the memory-mapped arrays to disk and then atomically writes the simulation state
+    (step, positions, velocities and accelerations) to checkpoint.npz in the store directory"""
+    import os # file handling
+    import numpy as np # computational
+
+    # make sure every stored snapshot up to this step is on disk before the checkpoint refers to it
+    for arr in arrays.values():
+        arr.flush()
+    # write to a temporary file first so a killed job never leaves a half written checkpoint
+    tmp_file = os.path.join(path, 'checkpoint.tmp.npz')
+    np.savez(tmp_file, **state)
+    os.replace(tmp_file, os.path.join(path, 'checkpoint.npz'))
+
+def _store_resume(path):
+    """this function reads the last checkpoint of a trajectory store, returns None if there is no checkpoint"""
+    import os # file handling
+    import numpy as np # computational
+
+    ck_file = os.path.join(path, 'checkpoint.npz')
+    if not os.path.exists(ck_file):
+        return None
+    with np.load(ck_file) as ck:
+        return {key: ck[key] for key in ck.files}
+
+def MSG_load(path, flat = True, metadata = False, result = False):
+    """
+    this function opens a trajectory store written by MSG_galaxy(..., store = path) without reading it into
+    memory; the arrays are memory-mapped, so only the parts that are indexed [ei. one timestep] are read from disk
+    ----------------------------------------------------------------------
+    path [string]: directory of the trajectory store
+
+    flat [boolean]: by default True, particle positions are returned as flat (S * N, 3) arrays like MSG_galaxy;
+    if False they are returned as (S, N, 3) arrays indexed by [snapshot, particle]
+
+    metadata [boolean]: by default False; if True, also return the store metadata dictionary
+    (dt, soft_param, mass, timesteps, particle_counts, snap_steps, full_bulges, dtype, completed_steps)
+    
+    result [boolean]: by default False; if True, return a MSG_result giving views of the store by disk label, 
+    snapshot, bulge and particle instead of the arrays [see MSG_result]
+    ----------------------------------------------------------------------------------
+    OUTPUT [numpy memmap]: Bulge_1_position, Bulge_2_position, Particle_position(s)
+    format: same arrays as returned by MSG_galaxy
+    example: bulge_a, bulge_b, particles, companion = MSG_load('merger_run')
+    =^._.^=
+    """
+    import os # file handling
+    import json # metadata header
+    import numpy as np # computational
+
+    with open(os.path.join(path, 'meta.json')) as f:
+        meta = json.load(f)
+    ck = _store_resume(path)
+    meta['completed_steps'] = int(ck['step']) if ck is not None else 0
+
+    # bulge tracks are stored as (rows, K, 3); full resolution tracks start at the initial state
+    bulges = np.lib.format.open_memmap(os.path.join(path, 'bulges.npy'), mode = 'r')
+    disks = [np.lib.format.open_memmap(os.path.join(path, 'disk' + str(d) + '.npy'), mode = 'r')
+             for d in range(len(meta['particle_counts']))]
+    if result:
+        from .MSGresult import MSG_result
+        labels = meta.get('labels', ['disk' + str(d) for d in range(len(disks))])
+        res = MSG_result(bulges, disks, labels, meta['snap_steps'], meta['full_bulges'], path, meta['dt'],
+                         meta['mass'], meta['soft_param'])
+        return (res, meta) if metadata else res
+    if meta['full_bulges']:
+        bulges = bulges[1:]
+    out = [bulges[:, k] for k in range(bulges.shape[1])]
+    for disk in disks:
+        out.append(disk.reshape(-1, 3) if flat else disk)
+
+    if metadata:
+        return tuple(out) + (meta,)
+    return tuple(out)
@@ -0,0 +1,157 @@
+def _sweep_run(kwargs):
+    """this function runs a single MSG_galaxy simulation from a dictionary of arguments (used by process pools)"""
+    from .MSGgalaxy import MSG_galaxy
+    return MSG_galaxy(**kwargs)
+
+def _sweep_disks(kwargs):
+    """this function returns the list of (positions, velocities) disk pairs of a set of MSG_galaxy arguments"""
+    from .MSGgalaxy import _disk_list
+    return _disk_list(kwargs.get('particle_pos'), kwargs.get('particle_vel'), kwargs.get('disk2'), 
+                      kwargs.get('diskvel'), kwargs.get('disks'))[1]
+
+def _sweep_nbytes(kwargs):
+    """this function estimates the memory in bytes needed by one MSG_galaxy simulation: the stored trajectories
+    plus the simulation state and scratch buffers of the test particle kernel"""
+    import numpy as np # computational
+    from .MSGgalaxy import _snapshot_steps
+
+    timesteps = int(kwargs['timesteps'])
+    S = len(_snapshot_steps(timesteps, kwargs.get('save_every', 1), kwargs.get('save_steps')))
+    K = np.shape(kwargs['gal_pos'])[-2]
+    N = sum(np.shape(pos)[-2] for pos, vel in _sweep_disks(kwargs))
+    bulge_rows = timesteps + 1 if kwargs.get('full_bulges', True) else S
+    # particle trajectories + (position, velocity, acceleration) + (N, K, 3) and (N, K) scratch buffers in the 
+    # particle dtype, bulge trajectories in float64
+    itemsize = np.dtype(kwargs.get('dtype', float)).itemsize
+    return itemsize * (S * N * 3 + 3 * N * 3 + N * K * 4) + 8 * bulge_rows * K * 3
+
+def MSG_sweep(scenarios, mode = 'auto', max_workers = None, max_memory = None, batch_particles = 5000, **kwargs):
+    """
+    this function runs MSG_galaxy for a list of initial conditions [ei. a grid of inclinations, mass ratios or
+    impact parameters], either stacked into a single vectorized simulation or spread over a pool of processes
+    ----------------------------------------------------------------------
+    scenarios [list of dictionaries]: MSG_galaxy arguments for each simulation
+    format: [{'gal_pos': pos1, 'gal_vel': vel1, 'mass': mas1, 'particle_pos': pos_p1, 'particle_vel': vel_p1}, ...]
+    arguments shared by every simulation [ei. dt, timesteps, soft_param] can be given as **kwargs instead
+
+    mode [string]: by default 'auto'
+    'batch': stack simulations with the same particle counts and settings along a leading batch axis and run
+    them in one vectorized simulation; best for many small disks
+    'pool': run each simulation separately in a pool of processes; best for large disks
+    'serial': run each simulation one after the other in this process
+    'auto': use 'batch' for simulations with at most batch_particles test particles, 'pool' for the others
+    simulations with options only available for a single simulation [adaptive, result, particle_mass] use 'pool'
+    in 'auto' mode
+
+    max_workers [integer]: by default None; maximum number of processes for 'pool' mode [default: cpu count]
+
+    max_memory [float]: by default None; approximate memory budget in bytes. limits the number of simulations
+    stacked in one batch and the number of processes running at the same time
+
+    batch_particles [integer]: by default 5000; maximum number of test particles per simulation for 'auto'
+    mode to stack simulations in a batch
+
+    [**kwargs]: MSG_galaxy arguments shared by every simulation [ei. dt = .01, timesteps = 1000, soft_param = .1]
+    values given in a scenario dictionary take priority
+    ----------------------------------------------------------------------------------
+    OUTPUT [list]: MSG_galaxy output for each scenario, in the same order as scenarios
+    example: results = MSG_sweep(scenarios, dt = .01, timesteps = 1000, soft_param = .1)
+    a, b, c = results[0]
+    the arrays in the scenario dictionaries are not modified
+    =^._.^=
+    """
+    import os # cpu count
+    import numpy as np # computational
+    from concurrent.futures import ProcessPoolExecutor # process pool
+    from .MSGgalaxy import MSG_galaxy
+
+    if mode not in ('auto', 'batch', 'pool', 'serial'):
+        raise ValueError("ERROR: mode must be 'auto', 'batch', 'pool' or 'serial' \n /ᐠ=ᆽ=ᐟ\\ <(hisss.....)")
+
+    # merge shared and per scenario arguments
+    runs = []
+    for scenario in scenarios:
+        run = dict(kwargs)
+        run.update(scenario)
+        if run.get('store') is not None:
+            raise ValueError('ERROR: MSG_sweep does not support trajectory stores \n /ᐠ=ᆽ=ᐟ\\ <(hisss.....)')
+        runs.append(run)
+    results = [None] * len(runs)
+
+    # options MSG_galaxy only supports for a single simulation, not a stacked batch
+    single_keys = ('adaptive', 'result', 'particle_mass')
+
+    def single_only(run):
+        return [k for k in single_keys if run.get(k) is not None and run.get(k) is not False]
+
+    def n_particles(run):
+        return sum(np.shape(pos)[-2] for pos, vel in _sweep_disks(run))
+
+    def stack(values):
+        # stacking copies the arrays, so the scenario arrays are not modified
+        return np.stack([np.asarray(v, dtype = float) for v in values])
+
+    # group simulations that can be stacked: same array shapes and same scalar settings
+    array_keys = ('gal_pos', 'gal_vel', 'mass', 'particle_pos', 'particle_vel', 'disk2', 'diskvel')
+    batches, singles = {}, []
+    for i, run in enumerate(runs):
+        if mode == 'batch' and single_only(run):
+            raise ValueError("ERROR: " + ', '.join(single_only(run)) + " cannot be used in a stacked batch, use "
+                             "mode = 'auto', 'pool' or 'serial' \n /ᐠ=ᆽ=ᐟ\\ <(hisss.....)")
+        if mode == 'batch' or (mode == 'auto' and not single_only(run) and n_particles(run) <= batch_particles):
+            key = tuple((k, np.shape(v)) if k in array_keys else 
+                        (k, tuple(v) if isinstance(v, dict) else len(v), 
+                         tuple((np.shape(p), np.shape(q)) for p, q in _sweep_disks({k: v}))) if k == 'disks' else
+                        (k, repr(v)) for k, v in sorted(run.items()))
+            batches.setdefault(key, []).append(i)
+        else:
+            singles.append(i)
+
+    # BATCHED SIMULATIONS
+    for members in batches.values():
+        # limit batch size by memory budget
+        size = len(members)
+        if max_memory is not None:
+            size = max(1, min(size, int(max_memory // _sweep_nbytes(runs[members[0]]))))
+        for b in range(0, len(members), size):
+            chunk = members[b:b + size]
+            stacked = dict(runs[chunk[0]])
+            for k in array_keys:
+                if stacked.get(k) is not None:
+                    stacked[k] = stack([runs[i][k] for i in chunk])
+            if stacked.get('disks') is not None:
+                labels = list(stacked['disks']) if isinstance(stacked['disks'], dict) else None
+                pairs = [_sweep_disks({'disks': runs[i]['disks']}) for i in chunk]
+                stacked['disks'] = [(stack([p[d][0] for p in pairs]), stack([p[d][1] for p in pairs]))
+                                    for d in range(len(pairs[0]))]
+                if labels is not None:
+                    stacked['disks'] = dict(zip(labels, stacked['disks']))
+            out = MSG_galaxy(**stacked)
+            for j, i in enumerate(chunk):
+                results[i] = tuple(arr[j] for arr in out)
+
+    # SEPARATE SIMULATIONS
+    if singles:
+        # copy arrays so the scenario arrays are not modified
+        jobs = []
+        for i in singles:
+            job = {k: (np.array(v, dtype = float) if k in array_keys and v is not None else v)
+                   for k, v in runs[i].items()}
+            if job.get('disks') is not None:
+                # copy disks, keeping labels
+                pairs = [(np.array(p, dtype = float), np.array(q, dtype = float)) for p, q in _sweep_disks(job)]
+                job['disks'] = dict(zip(job['disks'], pairs)) if isinstance(job['disks'], dict) else pairs
+            jobs.append(job)
+        workers = max_workers if max_workers is not None else os.cpu_count()
+        if max_memory is not None:
+            workers = min(workers, int(max_memory // max(_sweep_nbytes(job) for job in jobs)))
+        workers = max(1, min(workers, len(jobs)))
+        if mode == 'serial' or workers == 1:
+            outs = map(_sweep_run, jobs)
+        else:
+            with ProcessPoolExecutor(max_workers = workers) as pool:
+                outs = list(pool.map(_sweep_run, jobs))
+        for i, out in zip(singles, outs):
+            results[i] = out
+
+    return results
@@ -2,3 +2,9 @@ from .MSGdisk import *
 from .MSGgalaxy import * 
 from .MSGplot import *
 from .MSGrot import *
+from .MSGstore import *
+from .MSGsweep import *
+from .MSGresult import *
+from .MSGanalysis import *
+from .MSGgravity import *
+from .MSGpipeline import *
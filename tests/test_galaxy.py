@@ -0,0 +1,175 @@
+import numpy as np
+import pytest
+
+from MSGpy import MSG_disk, MSG_galaxy
+from MSGpy.MSGgalaxy import (_particle_accel, _particle_accel_reference, _particle_buffers, _bulge_accel,
+                             _bulge_accel_reference, _snapshot_steps)
+
+
+def _merger(rings = 2):
+    """'running the code' initial conditions of the README with small disks, as fresh arrays on every call"""
+    pos = np.array([[-12.5, 13.0, 0.0], [0.0, 0.0, 0.0]])
+    vel = np.array([[1.5, -1.0, 0.0], [0.0, 0.0, 0.0]])
+    mas = np.array([[1.0], [3.0]])
+    pos_p, vel_p, N = MSG_disk(rings, 3, -1, 3)
+    com_p, com_v, M = MSG_disk(rings, 1, -1, 3, [-12.5, 13.0, 0.0], [1.5, -1.0, 0.0])
+    return {'gal_pos': pos, 'gal_vel': vel, 'mass': mas, 'particle_pos': pos_p, 'particle_vel': vel_p,
+            'disk2': com_p, 'diskvel': com_v}
+
+
+class _Stop(Exception):
+    pass
+
+
+def _stop_at(step):
+    """progress callback interrupting a simulation after the given step"""
+    def callback(info):
+        if info['step'] >= step:
+            raise _Stop
+    return callback
+
+
+@pytest.mark.parametrize('seed', [0, 1, 2])
+def test_particle_accel_matches_reference(seed):
+    rng = np.random.default_rng(seed)
+    N, K = 500, 2
+    POS_GAL = rng.uniform(-20, 20, (K, 3))
+    POS_P = rng.uniform(-30, 30, (N, 3))
+    MASS = rng.uniform(.1, 2, (K, 1))
+    Sf = .1
+    out = np.zeros((N, 3))
+    DEL, G_BUF = _particle_buffers(N, K)
+    accel = _particle_accel(POS_GAL, POS_P, MASS, Sf, out, DEL, G_BUF)
+    np.testing.assert_allclose(accel, _particle_accel_reference(POS_GAL, POS_P, MASS, Sf), rtol = 1e-13,
+                               atol = 1e-15)
+
+
+@pytest.mark.parametrize('K', [2, 3, 7])
+def test_bulge_accel_matches_reference(K):
+    rng = np.random.default_rng(K)
+    POSITION = rng.uniform(-20, 20, (K, 3))
+    MASS = rng.uniform(.1, 2, (K, 1))
+    Sf = .1
+    np.testing.assert_allclose(_bulge_accel(POSITION, MASS, Sf), _bulge_accel_reference(POSITION, MASS, Sf),
+                               rtol = 1e-13, atol = 1e-15)
+
+
+def test_bulge_accel_batch_matches_reference():
+    rng = np.random.default_rng(3)
+    B, K = 4, 3
+    POSITION = rng.uniform(-20, 20, (B, K, 3))
+    MASS = rng.uniform(.1, 2, (B, K, 1))
+    accel = _bulge_accel(POSITION, MASS, .1)
+    for b in range(B):
+        np.testing.assert_allclose(accel[b], _bulge_accel_reference(POSITION[b], MASS[b], .1), rtol = 1e-13,
+                                   atol = 1e-15)
+
+
+def test_snapshot_steps():
+    np.testing.assert_array_equal(_snapshot_steps(10, 5), [0, 5, 10])
+    np.testing.assert_array_equal(_snapshot_steps(10, save_steps = [12, 3, 0, 3]), [0, 3])
+
+
+@pytest.mark.parametrize('save_every', [0, -2])
+def test_snapshot_steps_rejects_save_every_below_1(save_every):
+    with pytest.raises(ValueError, match = 'save_every'):
+        _snapshot_steps(10, save_every)
+
+
+def test_float32_drift_readme_scenario():
+    # 'running the code' initial conditions of the README
+    pos = np.array([[-12.5, 13.0, 0.0], [0.0, 0.0, 0.0]])
+    vel = np.array([[1.5, -1.0, 0.0], [0.0, 0.0, 0.0]])
+    mas = np.array([[1.0], [3.0]])
+    pos_p, vel_p, N = MSG_disk(number_of_rings = 6, mass = 3, rotation_dir = -1, density = 3.7)
+    com_p, com_v, M = MSG_disk(number_of_rings = 3, mass = 1, rotation_dir = -1, density = 6,
+                               origin = [-12.5, 13.0, 0.0], velocity = [1.5, -1.0, 0.0])
+    out = {}
+    for dtype in (np.float64, np.float32):
+        # MSG_galaxy updates the input arrays, so every run gets its own copies
+        out[dtype] = MSG_galaxy(pos.copy(), vel.copy(), mas, pos_p.copy(), vel_p.copy(), dt = .01, timesteps = 1000,
+                                soft_param = .1, disk2 = com_p.copy(), diskvel = com_v.copy(), save_steps = [1000],
+                                dtype = dtype, quiet = True)
+    a64, b64, c64, d64 = out[np.float64]
+    a32, b32, c32, d32 = out[np.float32]
+    assert c32.dtype == np.float32 and d32.dtype == np.float32
+    # the bulges are always integrated in float64
+    np.testing.assert_array_equal(a64, a32)
+    np.testing.assert_array_equal(b64, b32)
+    drift = np.linalg.norm(np.concatenate([c64 - c32, d64 - d32]), axis = 1)
+    assert np.median(drift) < 1e-4
+    assert np.percentile(drift, 90) < 1e-3
+
+
+def test_resume_rejects_missing_particle_mass(tmp_path):
+    store = str(tmp_path / 'run')
+    with pytest.raises(_Stop):
+        MSG_galaxy(**_merger(), dt = .01, timesteps = 100, soft_param = .1, store = store, checkpoint_every = 25,
+                   particle_mass = 1e-2, grid = None, callback = _stop_at(50), callback_every = 25, quiet = True)
+    with pytest.raises(ValueError, match = 'self_gravity'):
+        MSG_galaxy(**_merger(), dt = .01, timesteps = 100, soft_param = .1, store = store, checkpoint_every = 25,
+                   resume = True, quiet = True)
+
+
+def test_resume_is_bit_for_bit(tmp_path):
+    from MSGpy import MSG_load
+    store = str(tmp_path / 'run')
+    kwargs = dict(dt = .01, timesteps = 100, soft_param = .1, save_every = 10, quiet = True)
+    reference = MSG_galaxy(**_merger(), **kwargs)
+    with pytest.raises(_Stop):
+        MSG_galaxy(**_merger(), **kwargs, store = store, checkpoint_every = 25, callback = _stop_at(60),
+                   callback_every = 10)
+    # the run stopped after the checkpoint of step 50
+    assert MSG_load(store, metadata = True)[-1]['completed_steps'] == 50
+    resumed = MSG_galaxy(**_merger(), **kwargs, store = store, checkpoint_every = 25, resume = True)
+    loaded = MSG_load(store)
+    assert len(resumed) == len(reference) == len(loaded) == 4
+    for ref, res, load in zip(reference, resumed, loaded):
+        np.testing.assert_array_equal(res, ref)
+        np.testing.assert_array_equal(load, ref)
+
+
+@pytest.mark.parametrize('integrator, adaptive', [('leapfrog', False), ('yoshida4', False), ('leapfrog', True)])
+def test_workers_match_single_thread(monkeypatch, integrator, adaptive):
+    from MSGpy import MSGgalaxy
+    # chunks of 64 particles, so the disks are split between the threads
+    kernel = MSGgalaxy._particle_kernel
+    monkeypatch.setattr(MSGgalaxy, '_particle_kernel',
+                        lambda *args, **kwargs: kernel(*args, **kwargs, chunk_size = 64))
+    assert len(_merger(rings = 4)['particle_pos']) > 3 * 64
+    kwargs = dict(dt = .01, timesteps = 100, soft_param = .1, save_every = 10, integrator = integrator,
+                  adaptive = adaptive, quiet = True)
+    serial = MSG_galaxy(**_merger(rings = 4), **kwargs)
+    threaded = MSG_galaxy(**_merger(rings = 4), **kwargs, workers = 4)
+    for a, b in zip(serial, threaded):
+        np.testing.assert_array_equal(a, b)
+
+
+def _sweep_scenario(companion_mass, labelled):
+    """small merger with the given companion mass, with its disks as particle_pos / disk2 or a labelled dict"""
+    run = _merger()
+    run['mass'] = np.array([[companion_mass], [3.0]])
+    if labelled:
+        run['disks'] = {'primary': (run.pop('particle_pos'), run.pop('particle_vel')),
+                        'companion': (run.pop('disk2'), run.pop('diskvel'))}
+    return run
+
+
+@pytest.mark.parametrize('labelled', [False, True])
+@pytest.mark.parametrize('mode', ['batch', 'serial'])
+def test_sweep_matches_separate_runs(mode, labelled):
+    from MSGpy import MSG_sweep
+    kwargs = dict(dt = .01, timesteps = 50, soft_param = .1, save_every = 10, quiet = True)
+    masses = [.5, 1.0, 1.5]
+    results = MSG_sweep([_sweep_scenario(m, labelled) for m in masses], mode = mode, **kwargs)
+    for m, result in zip(masses, results):
+        expected = MSG_galaxy(**_sweep_scenario(m, labelled), **kwargs)
+        assert len(result) == len(expected) == 4
+        for a, b in zip(result, expected):
+            np.testing.assert_array_equal(a, b)
+
+
+def test_callback_every_below_1_raises():
+    with pytest.raises(ValueError, match = 'callback_every'):
+        MSG_galaxy(**_merger(), dt = .01, timesteps = 10, callback = lambda info: None, callback_every = 0,
+                   quiet = True)